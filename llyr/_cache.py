@@ -0,0 +1,81 @@
+from collections import OrderedDict
+
+import numpy as np
+from dask.utils import parse_bytes
+
+
+class LRUCache:
+    """In-memory cache of arrays limited to `max_bytes`, evicting the least
+    recently used entries first. Each entry lists the dataset paths it was read
+    from, `invalidate(path)` drops the ones depending on `path` or anything below it."""
+
+    def __init__(self, max_bytes="256MB"):
+        self._data = OrderedDict()
+        self.nbytes = 0
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes):
+        self._max_bytes = parse_bytes(max_bytes) if isinstance(max_bytes, str) else int(max_bytes)
+        self._evict()
+
+    def get(self, key, default=None):
+        if key not in self._data:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._data.move_to_end(key)
+        return self._data[key][0]
+
+    def put(self, key, value, deps=()):
+        self.pop(key)
+        if isinstance(value, tuple):
+            nbytes = sum(v.nbytes for v in value if isinstance(v, np.ndarray))
+        elif isinstance(value, (bytes, bytearray)):
+            nbytes = len(value)
+        else:
+            nbytes = np.asarray(value).nbytes
+        if nbytes > self.max_bytes:
+            return value
+        self._data[key] = (value, nbytes, tuple(deps))
+        self.nbytes += nbytes
+        self._evict()
+        return value
+
+    def pop(self, key):
+        if key in self._data:
+            self.nbytes -= self._data.pop(key)[1]
+
+    def invalidate(self, path: str):
+        path = path.strip("/")
+        for key, (_, _, deps) in list(self._data.items()):
+            for dep in deps:
+                if dep == path or dep.startswith(f"{path}/"):
+                    self.pop(key)
+                    break
+
+    def clear(self):
+        self._data.clear()
+        self.nbytes = 0
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes:
+            self.nbytes -= self._data.popitem(last=False)[1][1]
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return (
+            f"LRUCache({len(self)} entries, {self.nbytes / 1e6:.1f}/{self.max_bytes / 1e6:.0f} MB,"
+            f" {self.hits} hits, {self.misses} misses)"
+        )
@@ -0,0 +1,99 @@
+import numpy as np
+from numcodecs import register_codec
+from numcodecs.abc import Codec
+from numcodecs.compat import ensure_ndarray, ndarray_copy
+
+
+class TimeDelta(Codec):
+    """Lossless delta filter along the time axis of a chunk: each frame of
+    `stride` elements is replaced by the difference of its bits with the
+    previous frame, which leaves mostly small integers for slowly varying data"""
+
+    codec_id = "llyr_time_delta"
+
+    def __init__(self, stride: int, dtype="<f4"):
+        self.stride = stride
+        self.dtype = np.dtype(dtype)
+        self._int = np.dtype(f"{self.dtype.byteorder}u{self.dtype.itemsize}")
+
+    def encode(self, buf):
+        arr = ensure_ndarray(buf).view(self.dtype).view(self._int).reshape(-1, self.stride)
+        enc = arr.copy()
+        enc[1:] -= arr[:-1]
+        return enc
+
+    def decode(self, buf, out=None):
+        enc = ensure_ndarray(buf).view(self._int).reshape(-1, self.stride)
+        dec = np.cumsum(enc, axis=0, dtype=self._int).view(self.dtype)
+        return ndarray_copy(dec, out)
+
+    def get_config(self):
+        return dict(id=self.codec_id, stride=self.stride, dtype=self.dtype.str)
+
+    def __repr__(self):
+        return f"TimeDelta(stride={self.stride}, dtype='{self.dtype.str}')"
+
+
+class ErrorBound(Codec):
+    """Lossy filter storing every value (or real and imaginary part) as the
+    nearest multiple of 2 * `error_bound`, so the absolute error of the decoded
+    float32/complex64 values is at most `error_bound` (plus their float32
+    rounding). By default each chunk is stored on the smallest of int8/int16/int32
+    that fits its range divided by the error bound (e.g. int16 for m in [-1, 1]
+    within 1e-4), given in the first element, `astype` forces one integer type
+    for all the chunks."""
+
+    codec_id = "llyr_error_bound"
+
+    def __init__(self, error_bound: float, dtype="<f4", astype=None):
+        self.error_bound = float(error_bound)
+        self.dtype = np.dtype(dtype)
+        self.astype = None if astype is None else np.dtype(astype)
+        # complex values are stored as pairs of floats
+        self._real = np.empty(0, self.dtype).real.dtype
+
+    def encode(self, buf):
+        arr = ensure_ndarray(buf).view(self.dtype).view(self._real)
+        q = np.round(arr.astype(np.float64) / (2 * self.error_bound))
+        qmax = np.abs(q).max(initial=0)
+        if self.astype is not None:
+            astype = self.astype
+        else:
+            fits = [n for n in (1, 2, 4) if qmax <= np.iinfo(f"i{n}").max]
+            astype = np.dtype(f"<i{fits[0]}") if fits else None
+        if astype is None or qmax > np.iinfo(astype).max:
+            raise ValueError(
+                f"Values up to {np.abs(arr).max():.3g} don't fit in {astype or 'int32'} with error_bound={self.error_bound}"
+            )
+        if self.astype is not None:
+            return q.astype(astype)
+        # the first element holds the itemsize, keeping the output typed for shuffle
+        enc = np.empty(1 + q.size, astype)
+        enc[0] = astype.itemsize
+        enc[1:] = q.ravel()
+        return enc
+
+    def decode(self, buf, out=None):
+        if self.astype is not None:
+            q = ensure_ndarray(buf).view(self.astype)
+        else:
+            enc = ensure_ndarray(buf).view(np.uint8)
+            q = enc.view(f"<i{enc[0]}")[1:]
+        dec = (q * (2 * self.error_bound)).astype(self._real).view(self.dtype)
+        return ndarray_copy(dec, out)
+
+    def get_config(self):
+        return dict(
+            id=self.codec_id,
+            error_bound=self.error_bound,
+            dtype=self.dtype.str,
+            astype=None if self.astype is None else self.astype.str,
+        )
+
+    def __repr__(self):
+        astype = None if self.astype is None else f"'{self.astype.str}'"
+        return f"ErrorBound(error_bound={self.error_bound}, dtype='{self.dtype.str}', astype={astype})"
+
+
+register_codec(TimeDelta)
+register_codec(ErrorBound)
@@ -0,0 +1,40 @@
+import numpy as np
+
+from . import _fft
+
+
+def _next_pow2(n: int) -> int:
+    return 1 << (n - 1).bit_length()
+
+
+def zoom_fft(
+    x: np.ndarray, freqs: np.ndarray, dt: float, axis: int = 0, backend=None
+) -> np.ndarray:
+    """Fourier transform of `x` along `axis` evaluated only at the evenly spaced
+    `freqs` (Hz), with Bluestein's chirp-z algorithm. Gives the same values as
+    `np.fft.rfft` at the frequencies where both are defined, for a cost of a few
+    FFTs of length ~len(x) + len(freqs), done with `backend` (name, workers) or
+    the active one."""
+    x = np.moveaxis(np.asarray(x), axis, 0)
+    # single precision input stays in single precision
+    ctype = np.result_type(x.dtype, np.complex64)
+    n, m = x.shape[0], len(freqs)
+    f0 = freqs[0]
+    df = freqs[1] - freqs[0] if m > 1 else 0.0
+    # the chirp phases are reduced modulo 2 before the exponential to keep them exact
+    a = df * dt
+    ns = np.arange(n)
+    ks = np.arange(m)
+    pre = np.exp(-1j * np.pi * (np.mod(2 * f0 * dt * ns, 2) + np.mod(a * ns**2, 2)))
+    pre = pre.astype(ctype)
+    post = np.exp(-1j * np.pi * np.mod(a * ks**2, 2)).astype(ctype)
+    length = _next_pow2(n + m - 1)
+    chirp = np.zeros(length, ctype)
+    chirp[:m] = np.exp(1j * np.pi * np.mod(a * ks**2, 2))
+    chirp[length - n + 1 :] = np.exp(1j * np.pi * np.mod(a * ns[n - 1 : 0 : -1] ** 2, 2))
+    expand = (slice(None),) + (None,) * (x.ndim - 1)
+    y = _fft.fft(x * pre[expand], length, axis=0, backend=backend)
+    y *= _fft.fft(chirp, backend=backend)[expand]
+    y = _fft.ifft(y, axis=0, backend=backend)[:m]
+    y *= post[expand]
+    return np.moveaxis(y, 0, axis)
@@ -0,0 +1,172 @@
+import atexit
+import os
+import pickle
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import numpy as np
+
+BACKENDS = ("numpy", "scipy", "pyfftw")
+_state = {"name": None, "workers": None}
+# set by `fft_backend`, local to the thread or asyncio task
+_active = ContextVar("llyr_fft_backend", default=None)
+_wisdom = {"loaded": False}
+
+
+def _wisdom_path() -> str:
+    from appdirs import user_cache_dir
+
+    return os.path.join(user_cache_dir("llyr"), "fftw_wisdom.pkl")
+
+
+def _save_wisdom():
+    import pyfftw
+
+    path = _wisdom_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        pickle.dump(pyfftw.export_wisdom(), f)
+
+
+def _load_wisdom():
+    import pyfftw
+
+    if _wisdom["loaded"]:
+        return
+    _wisdom["loaded"] = True
+    pyfftw.interfaces.cache.enable()
+    path = _wisdom_path()
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            pyfftw.import_wisdom(pickle.load(f))
+    atexit.register(_save_wisdom)
+
+
+def _installed() -> str:
+    try:
+        import scipy.fft  # noqa: F401
+
+        return "scipy"
+    except ImportError:
+        return "numpy"
+
+
+def _check(name) -> str:
+    if name is None:
+        name = _installed()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown fft backend '{name}', use one of {BACKENDS}")
+    if name == "pyfftw":
+        _load_wisdom()
+    return name
+
+
+def set_fft_backend(name=None, workers=None):
+    """Default backend of every transform done by llyr: "numpy", "scipy"
+    (multithreaded with `workers`) or "pyfftw" (multithreaded, plans kept in a
+    wisdom file in the user cache dir). None picks scipy when it is installed,
+    else numpy. `workers` defaults to the number of cpus."""
+    _state["name"] = _check(name)
+    _state["workers"] = workers
+
+
+def get_fft_backend():
+    """(name, workers) of the backend active in this thread"""
+    active = _active.get()
+    if active is None:
+        if _state["name"] is None:
+            set_fft_backend()
+        active = (_state["name"], _state["workers"])
+    return active[0], active[1] or os.cpu_count()
+
+
+@contextmanager
+def fft_backend(name=None, workers=None):
+    """Use another fft backend in this block only, other threads keep theirs:
+    `with fft_backend("pyfftw", 64): ...`"""
+    token = _active.set((_check(name), workers))
+    try:
+        yield
+    finally:
+        _active.reset(token)
+
+
+def task_backend():
+    """The active backend for the transforms run in dask tasks: the workers are
+    shared between the threads of the dask scheduler instead of each task
+    starting `workers` threads"""
+    import dask
+
+    name, workers = get_fft_backend()
+    threads = dask.config.get("num_workers", None) or os.cpu_count()
+    return name, max(1, workers // threads)
+
+
+def _call(func: str, x, *args, backend=None, **kwargs):
+    name, workers = get_fft_backend() if backend is None else backend
+    x = np.asarray(x)
+    if name == "scipy":
+        import scipy.fft
+
+        return getattr(scipy.fft, func)(x, *args, workers=workers, **kwargs)
+    if name == "pyfftw":
+        import pyfftw.interfaces.numpy_fft
+
+        return getattr(pyfftw.interfaces.numpy_fft, func)(x, *args, threads=workers, **kwargs)
+    out = getattr(np.fft, func)(x, *args, **kwargs)
+    # older numpy always computes in double precision
+    if x.dtype in (np.float32, np.complex64) and out.dtype == np.complex128:
+        out = out.astype(np.complex64)
+    elif x.dtype in (np.float32, np.complex64) and out.dtype == np.float64:
+        out = out.astype(np.float32)
+    return out
+
+
+def fft(x, n=None, axis=-1, norm=None, backend=None):
+    return _call("fft", x, n, axis, norm, backend=backend)
+
+
+def ifft(x, n=None, axis=-1, norm=None, backend=None):
+    return _call("ifft", x, n, axis, norm, backend=backend)
+
+
+def rfft(x, n=None, axis=-1, norm=None, backend=None):
+    return _call("rfft", x, n, axis, norm, backend=backend)
+
+
+def irfft(x, n=None, axis=-1, norm=None, backend=None):
+    return _call("irfft", x, n, axis, norm, backend=backend)
+
+
+def fft2(x, s=None, axes=(-2, -1), norm=None, backend=None):
+    return _call("fft2", x, s, axes, norm, backend=backend)
+
+
+def ifft2(x, s=None, axes=(-2, -1), norm=None, backend=None):
+    return _call("ifft2", x, s, axes, norm, backend=backend)
+
+
+def fftn(x, s=None, axes=None, norm=None, backend=None):
+    return _call("fftn", x, s, axes, norm, backend=backend)
+
+
+def ifftn(x, s=None, axes=None, norm=None, backend=None):
+    return _call("ifftn", x, s, axes, norm, backend=backend)
+
+
+def rfftn(x, s=None, axes=None, norm=None, backend=None):
+    return _call("rfftn", x, s, axes, norm, backend=backend)
+
+
+def dask_fft(func: str):
+    """The dask version of one of the functions above, e.g. `dask_fft("rfft")`,
+    with the backend active when the graph is built (see `task_backend`)"""
+    import dask.array as da
+
+    backend = task_backend()
+
+    def transform(x, n=None, axis=-1, norm=None):
+        return globals()[func](x, n, axis, norm, backend=backend)
+
+    transform.__name__ = func
+    return da.fft.fft_wrap(transform, kind=func)
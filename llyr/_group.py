@@ -0,0 +1,221 @@
+import hashlib
+import os
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import zarr
+
+from . import _codecs  # registers the llyr filters with numcodecs
+from ._cache import LRUCache
+from ._store import ChunkCache, ConsolidatedStore
+from ._utils import rechunk
+
+
+def op(path, precision="single", mem_cache="256MB", disk_cache="4GB"):
+    """Opens the zarr folder at `path`. Chunks of remote (ssh://) sims go through
+    a memory and disk cache of `mem_cache` and `disk_cache` bytes. The metadata
+    is read once, datasets written by other processes since then are not seen
+    until `reload()`. Use it as a context manager (or `.store.close()`) to write
+    the consolidated metadata as soon as possible, it is written at exit otherwise."""
+    if "ssh://" in path:
+        store = ChunkCache(zarr.storage.FSStore(path), mem_cache, disk_cache)
+    else:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Path Not Found : '{path}'")
+        store = zarr.storage.DirectoryStore(path)
+    return Group(ConsolidatedStore(store), precision)
+
+
+class Group(zarr.hierarchy.Group):
+    def __init__(self, store, precision="single") -> None:
+        zarr.hierarchy.Group.__init__(self, store)
+        self.precision = precision
+        self.cache = LRUCache("256MB")
+        self.abs_path = Path(store.path).absolute()
+        self.sim_name = self.abs_path.name.replace(self.abs_path.suffix, "")
+        self._update_class_dict()
+
+    @cached_property
+    def plot(self):
+        from .plot import Plot
+
+        return Plot(self)
+
+    @cached_property
+    def calc(self):
+        from .calc import Calc
+
+        return Calc(self)
+
+    def __repr__(self) -> str:
+        return f"Llyr('{self.sim_name}')"
+
+    def __str__(self) -> str:
+        return f"Llyr('{self.sim_name}')"
+
+    def reload(self):
+        """Rereads the metadata and empties `self.cache`, e.g. after another process
+        wrote to the sim"""
+        if isinstance(self.store, ConsolidatedStore):
+            self.store.consolidate()
+        self.cache.clear()
+        self._update_class_dict()
+
+    def stamp(self, dset: str) -> str:
+        """Changes whenever `dset` is rewritten, also by another process: hash of
+        its metadata and, in a local folder, of the mtime of its folder, which
+        every chunk write updates"""
+        store = self.store
+        meta = b"".join(bytes(store.get(f"{dset}/{k}", b"")) for k in (".zarray", ".zattrs"))
+        mtime = None
+        if isinstance(getattr(store, "base", store), zarr.storage.DirectoryStore):
+            try:
+                mtime = os.stat(os.path.join(self.abs_path, dset)).st_mtime_ns
+            except OSError:
+                pass
+        return hashlib.sha1(meta + str(mtime).encode()).hexdigest()[:16]
+
+    @property
+    def precision(self) -> str:
+        """"single" (default) or "double": dtype of the windows, intermediates and
+        stored results of the calc modules. Single precision spectra agree with
+        double precision ones to ~1e-5 of their maximum."""
+        return self._precision
+
+    @precision.setter
+    def precision(self, precision: str):
+        if precision not in ("single", "double"):
+            raise ValueError("precision must be 'single' or 'double'")
+        self._precision = precision
+
+    @property
+    def float_dtype(self):
+        return np.dtype({"single": np.float32, "double": np.float64}[self.precision])
+
+    @property
+    def complex_dtype(self):
+        return np.dtype({"single": np.complex64, "double": np.complex128}[self.precision])
+
+    def _update_class_dict(self):
+        for k, v in self.attrs.items():
+            self.__dict__[k] = v
+
+    def create_dataset(self, name, **kwargs):
+        self.cache.invalidate(name)
+        return zarr.hierarchy.Group.create_dataset(self, name, **kwargs)
+
+    def __delitem__(self, item):
+        self.cache.invalidate(item)
+        zarr.hierarchy.Group.__delitem__(self, item)
+
+    def move(self, source, dest):
+        self.cache.invalidate(source)
+        self.cache.invalidate(dest)
+        zarr.hierarchy.Group.move(self, source, dest)
+
+    def rm(self, dset: str):
+        self.cache.invalidate(dset)
+        self.store.rmdir(dset)
+
+    def mkdir(self, name: str):
+        os.makedirs(f"{self.abs_path}/{name}", exist_ok=True)
+
+    @property
+    def pp(self):
+        return self.tree(expand=True)
+
+    @property
+    def p(self):
+        print(self.tree())
+
+    def c_to_comp(self, c):
+        return ["mx", "my", "mz"][c]
+
+    def comp_to_c(self, c):
+        return {"mx": 0, "my": 1, "mz": 2}[c]
+
+    def get_mode(self, dset: str, f: float, c=None):
+        """Mode of `dset` at the frequency closest to `f` (GHz), from `modes/{dset}/arr`
+        if it exists else with `calc.lazy_modes`. The freqs and the maps are kept in
+        `self.cache` with the stamp of their source, so asking for the same mode
+        again doesn't touch the disk unless the source was rewritten, also through
+        another handle or by another process."""
+        if f"modes/{dset}/arr" in self:
+            sources = (f"modes/{dset}/arr",)
+        else:
+            sources = (dset, "stable") if "stable" in self else (dset,)
+        stamp = tuple(self.stamp(s) for s in sources)
+        deps = (dset, f"modes/{dset}/arr", f"modes/{dset}/lazy")
+        cached = self.cache.get(f"modes/{dset}/freqs")
+        if cached is None or cached[1] != stamp:
+            if sources[0] == f"modes/{dset}/arr":
+                freqs = self[f"modes/{dset}/freqs"][:]
+            else:
+                ts = self[dset].attrs["t"][: self[dset].shape[0]]
+                freqs = np.fft.rfftfreq(len(ts), (ts[-1] - ts[0]) / len(ts)) * 1e-9
+            self.cache.put(f"modes/{dset}/freqs", (freqs, stamp), deps)
+        else:
+            freqs = cached[0]
+        fi = int(np.abs(freqs - f).argmin())
+        cached = self.cache.get(f"modes/{dset}/{fi}")
+        if cached is None or cached[1] != stamp:
+            if sources[0] == f"modes/{dset}/arr":
+                arr = self[f"modes/{dset}/arr"][fi]
+            else:
+                arr = self.calc.lazy_modes(dset, [freqs[fi]])[0]
+            self.cache.put(f"modes/{dset}/{fi}", (arr, stamp), deps)
+        else:
+            arr = cached[0]
+        if c is None:
+            return arr
+        else:
+            return arr[..., c]
+
+    def get_fft(self, c, xmin: int = 0, normalize=True, force=False):
+        if "fft/m" not in self or force:
+            print("Calculating modes ...")
+        freqs = self.fft.m.freqs[xmin:]
+        fft = self.fft.m.max[xmin:, c]
+        if normalize:
+            fft /= fft.max()
+        return freqs, fft
+
+    def rechunk(
+        self, dset: str, target_chunks, max_mem="1GB", compressor="same", filters="same"
+    ):
+        """Rewrites `dset` with `target_chunks` (None for a whole axis) without
+        holding more than `max_mem`, e.g. (None, 1, 64, 64, 3) for time contiguous
+        chunks. The result replaces `dset` only once it is fully written."""
+        source = self[dset]
+        chunks = tuple(s if c is None else c for s, c in zip(source.shape, target_chunks))
+        tmp = f"{dset}_rechunked"
+        dest = self.create_dataset(
+            tmp,
+            shape=source.shape,
+            chunks=chunks,
+            dtype=source.dtype,
+            compressor=source.compressor if compressor == "same" else compressor,
+            filters=source.filters if filters == "same" else filters,
+            fill_value=source.fill_value,
+            overwrite=True,
+        )
+        dest.attrs.update(source.attrs.asdict())
+        try:
+            rechunk(source, dest, max_mem)
+        except BaseException:
+            self.rm(tmp)
+            raise
+        self.move(dset, f"{dset}_old")
+        self.move(tmp, dset)
+        self.rm(f"{dset}_old")
+        return self[dset]
+
+    def check_path(self, dset: str, force: bool = False):
+        if dset in self:
+            if force:
+                self.rm(dset)
+            else:
+                raise NameError(
+                    f"The dataset:'{dset}' already exists, you can use 'force=True'"
+                )
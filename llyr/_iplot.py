@@ -1,13 +1,10 @@
-from glob import glob
 from tokenize import Name
 import matplotlib.pyplot as plt
 import matplotlib as mpl
 from matplotlib.widgets import Button
-import numpy as np
-import zarr
-import peakutils
 
 from ._utils import get_cmaps
+from ._sweep import sweep_to_zarr
 
 
 def iplotp(op, path, xstep=2, comps=None, fmin=0, fmax=20, ax=None):
@@ -20,22 +17,13 @@ def iplotp(op, path, xstep=2, comps=None, fmin=0, fmax=20, ax=None):
 
     if comps is None:
         comps = [0, 2]
-    paths = sorted(
-        glob(f"{path}/*.zarr"), key=lambda x: int(x.split("/")[-1].replace(".zarr", ""))
-    )
-    if len(paths) == 0:
-        raise NameError("Wrong path")
-    xlabels = np.array([int(p.split("/")[-1].replace(".zarr", "")) for p in paths])
+    sweep = sweep_to_zarr(path)
+    xlabels = sweep["params"][:].astype(int)
     lstep = xlabels[1] - xlabels[0]
+    freqs = sweep["freqs"][2:]
     cmaps, handles = get_cmaps()
     for comp in comps:
-        arr = []
-        for p in paths:
-            m = op(p)
-            arr.append(m.fft.m.max[2:, comp])
-        arr = np.array(arr).T
-        ts = m.m.attrs["t"]
-        freqs = np.fft.rfftfreq(m.m.shape[0], (ts[-1] - ts[0]) / len(ts))[2:] * 1e-9
+        arr = sweep["spec"][:, 2:, comp].T
         ax.imshow(
             arr,
             aspect="auto",
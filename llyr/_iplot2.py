@@ -1,22 +1,21 @@
-from glob import glob
 from timeit import repeat
 import matplotlib.pyplot as plt
 import matplotlib as mpl
 from matplotlib.widgets import Button
 import numpy as np
 import zarr
-import peakutils
 
 from ._utils import get_cmaps, make_cmap
+from .calc.peaks import find_peaks
+from ._sweep import sweep_to_zarr
 
 
 def iplotp2(op, path, xstep=2, comps=None, fmin=0, fmax=20, unit="mT"):
     if comps is None:
         comps = [0, 2]
-    paths = sorted(
-        glob(f"{path}/*.zarr"), key=lambda x: int(x.split("/")[-1].replace(".zarr", ""))
-    )  # [:110]
-    xlabels = np.array([int(p.split("/")[-1].replace(".zarr", "")) for p in paths])
+    sweep = sweep_to_zarr(path)
+    paths = [f"{path}/{n}" for n in sweep.attrs["names"]]
+    xlabels = sweep["params"][:].astype(int)
     lstep = xlabels[1] - xlabels[0]
     fig = plt.figure(figsize=(8, 4), dpi=150)
     gs = fig.add_gridspec(3, 6)
@@ -25,14 +24,9 @@ def iplotp2(op, path, xstep=2, comps=None, fmin=0, fmax=20, unit="mT"):
     gs.update(left=0.08, right=0.99, top=0.88, bottom=0.01, wspace=0.1, hspace=0.1)
     cmaps, handles = get_cmaps()
     cm1 = make_cmap((139, 233, 253, 0), (139, 233, 253, 255), 256)
+    freqs = sweep["freqs"][2:]
     for comp in comps:
-        arr = []
-        for p in paths:
-            m = op(p)
-            arr.append(m.fft.m.max[2:, comp])
-        arr = np.array(arr).T
-        ts = m.m.attrs["t"]
-        freqs = np.fft.rfftfreq(m.m.shape[0], (ts[-1] - ts[0]) / len(ts))[2:] * 1e-9
+        arr = sweep["spec"][:, 2:, comp].T
         ax1.imshow(
             arr,
             aspect="auto",
@@ -131,7 +125,7 @@ def iplotp2(op, path, xstep=2, comps=None, fmin=0, fmax=20, unit="mT"):
         if snap:
             fft = m.fft.m.max[2:, 0]
             freqs = m.fft.m.freqs[2:]  # * 1e-9
-            peaks = freqs[peakutils.indexes(fft, thres=s.thres, min_dist=2)]
+            peaks = find_peaks(fft, freqs, s.thres, 2)["freq"]
             s.peaks = peaks
             s.peak_index = np.abs(peaks - y).argmin()
             y = peaks[s.peak_index]
@@ -0,0 +1,17 @@
+from types import ModuleType
+
+
+class LazyPackage(ModuleType):
+    """Module type of the calc and plot packages: when a submodule gets imported
+    the package attribute of the same name is its class, e.g. `llyr.calc.modes`
+    is the `modes` class like with the former eager `from .modes import modes`,
+    not the submodule the import system would bind there."""
+
+    def __setattr__(self, name, value):
+        if (
+            isinstance(value, ModuleType)
+            and value.__name__ == f"{self.__name__}.{name}"
+            and hasattr(value, name)
+        ):
+            value = getattr(value, name)
+        super().__setattr__(name, value)
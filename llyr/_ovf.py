@@ -0,0 +1,321 @@
+import os
+import re
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+INDEX_VERSION = 1
+FRAME_RE = re.compile(r"(.*)(\d{6})$")
+CONTROL_NUMBERS = {4: 1234567.0, 8: 123456789012345.0}
+DATA_RE = re.compile(rb"^#\s*begin:\s*data\s+(text|binary\s+([48]))\s*\r?$", re.I | re.M)
+HEADER_RE = re.compile(rb"^#\s*([^:\r\n]+?)\s*:\s*(.*?)\s*\r?$", re.M)
+TIME_RE = re.compile(r"total simulation time:\s*(\S+)", re.I)
+
+
+class OvfFile:
+    """OOMMF OVF 1.0/2.0 rectangular mesh file, the header is parsed once and
+    `data` is a read-only memory map of the data block (Binary 4/8) or the
+    parsed values (Text)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            head = b""
+            while True:
+                block = f.read(4096)
+                head += block
+                match = DATA_RE.search(head)
+                if match is not None or not block:
+                    break
+            if match is None:
+                raise ValueError(f"No data block in '{path}'")
+            self.header = {}
+            for k, v in HEADER_RE.findall(head[: match.start()]):
+                k, v = k.decode("ASCII").lower(), v.decode("ASCII")
+                # OVF 1.0 allows several desc lines
+                self.header[k] = f"{self.header[k]}\n{v}" if k in self.header else v
+            start = match.end() + 1
+            if match.group(2) is None:
+                self.format = "Text"
+                self.itemsize = None
+            else:
+                self.format = f"Binary {int(match.group(2))}"
+                self.itemsize = int(match.group(2))
+                f.seek(start)
+                control = f.read(self.itemsize)
+        first_line = head.split(b"\n", 1)[0].decode("ASCII").lower()
+        self.version = "1.0" if "v1.0" in first_line or "ovf 1.0" in first_line else "2.0"
+        if self.header.get("meshtype", "rectangular") != "rectangular":
+            raise ValueError(f"Only rectangular meshes are supported: '{path}'")
+        self.Nx = int(self.header["xnodes"])
+        self.Ny = int(self.header["ynodes"])
+        self.Nz = int(self.header["znodes"])
+        # OVF 1.0 files are always vector fields
+        self.comp = int(self.header.get("valuedim", 3))
+        self.dx = float(self.header["xstepsize"])
+        self.dy = float(self.header["ystepsize"])
+        self.dz = float(self.header["zstepsize"])
+        self.shape = (self.Nz, self.Ny, self.Nx, self.comp)
+        t = TIME_RE.search(self.header.get("desc", ""))
+        self.t = float(t.group(1)) if t else None
+        if self.itemsize is None:
+            self.offset = start
+            self.dtype = np.dtype(np.float64)
+        else:
+            self.dtype = self._check_control(control)
+            self.offset = start + self.itemsize
+        self._data = None
+
+    def _check_control(self, control: bytes) -> np.dtype:
+        expected = CONTROL_NUMBERS[self.itemsize]
+        # OVF 2.0 is little endian, OVF 1.0 big endian, but both happen in the wild
+        for endian in ("<", ">") if self.version == "2.0" else (">", "<"):
+            dtype = np.dtype(f"{endian}f{self.itemsize}")
+            if len(control) == self.itemsize and np.frombuffer(control, dtype)[0] == expected:
+                return dtype
+        raise ValueError(f"Wrong control number for {self.format} in '{self.path}'")
+
+    @property
+    def data(self) -> np.ndarray:
+        if self._data is None:
+            if self.itemsize is None:
+                with open(self.path, "rb") as f:
+                    f.seek(self.offset)
+                    text = f.read()
+                text = text[: re.search(rb"^#\s*end:\s*data", text, re.I | re.M).start()]
+                self._data = np.fromstring(text.decode("ASCII"), self.dtype, sep=" ")
+                self._data = self._data.reshape(self.shape)
+            else:
+                self._data = np.memmap(
+                    self.path, self.dtype, mode="r", offset=self.offset, shape=self.shape
+                )
+        return self._data
+
+    @property
+    def parms(self) -> dict:
+        return {
+            "comp": self.comp,
+            "Nx": self.Nx,
+            "Ny": self.Ny,
+            "Nz": self.Nz,
+            "dx": self.dx,
+            "dy": self.dy,
+            "dz": self.dz,
+        }
+
+    def __repr__(self) -> str:
+        return f"OvfFile('{self.path}', {self.format}, shape={self.shape})"
+
+
+def read_frame(path: str, offset: int, dtype: str, shape) -> np.ndarray:
+    """Reads a binary data block at a known offset without parsing the header"""
+    count = int(np.prod(shape))
+    arr = np.fromfile(path, dtype, count=count, offset=offset)
+    return arr.astype(np.float32, copy=False).reshape(shape)
+
+
+def ovf_complete(path: str) -> bool:
+    """False while mumax is still writing the file"""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() < 16:
+            return False
+        f.seek(-16, os.SEEK_END)
+        return f.read().strip().endswith(b"# End: Segment")
+
+
+def index_path(out_path: str) -> str:
+    return f"{os.path.normpath(out_path)}.index.json"
+
+
+def ovf_index(out_path: str, save: bool = True) -> dict:
+    """Index of the ovf files of a mumax output folder, grouped by dataset.
+
+    For every file the frame number, byte offset of the data block, simulation
+    time, size and mtime are kept, shape, dtype and cell size once per dataset.
+    The index is stored next to the folder and only the files whose size or
+    mtime changed are read again."""
+    path = index_path(out_path)
+    dir_mtime = os.stat(out_path).st_mtime_ns
+    old = {}
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            index = json.load(f)
+        if index["version"] == INDEX_VERSION:
+            # new files change the folder mtime, files being written don't
+            if index["mtime"] == dir_mtime and index["complete"]:
+                return index
+            for dset, d in index["dsets"].items():
+                for i, name in enumerate(d["files"]):
+                    old[name] = (dset, d, i)
+    dsets = {}
+    with os.scandir(out_path) as entries:
+        entries = sorted(
+            (e for e in entries if e.name.endswith(".ovf") and e.is_file()),
+            key=lambda e: e.name,
+        )
+    for e in entries:
+        stat = e.stat()
+        stem = e.name[:-4]
+        match = FRAME_RE.match(stem)
+        dset, frame = (match.group(1), int(match.group(2))) if match else (stem, -1)
+        if e.name in old and old[e.name][1]["sizes"][old[e.name][2]] == stat.st_size:
+            _, o, i = old[e.name]
+            if o["mtimes"][i] == stat.st_mtime_ns and o["complete"][i]:
+                row = dict(
+                    offset=o["offsets"][i], t=o["t"][i], complete=True, parms=o
+                )
+            else:
+                row = _index_row(e.path)
+        else:
+            row = _index_row(e.path)
+        d = dsets.setdefault(
+            dset,
+            dict(files=[], frames=[], offsets=[], t=[], sizes=[], mtimes=[], complete=[]),
+        )
+        if row["complete"]:
+            parms = row["parms"]
+            if "shape" not in d:
+                for k in ("shape", "dtype", "format", "dx", "dy", "dz"):
+                    d[k] = parms[k]
+            elif [d["shape"], d["dtype"]] != [list(parms["shape"]), parms["dtype"]]:
+                raise ValueError(
+                    f"'{e.path}' has shape {parms['shape']} and dtype {parms['dtype']}"
+                    f" but the other '{dset}' files have {d['shape']} and {d['dtype']}"
+                )
+        d["files"].append(e.name)
+        d["frames"].append(frame)
+        d["offsets"].append(row["offset"])
+        d["t"].append(row["t"])
+        d["sizes"].append(stat.st_size)
+        d["mtimes"].append(stat.st_mtime_ns)
+        d["complete"].append(row["complete"])
+    index = dict(
+        version=INDEX_VERSION,
+        mtime=dir_mtime,
+        complete=all(all(d["complete"]) for d in dsets.values()),
+        dsets=dsets,
+    )
+    if save:
+        with open(path, "w") as f:
+            json.dump(index, f, separators=(",", ":"))
+    return index
+
+
+def _index_row(path: str) -> dict:
+    try:
+        if not ovf_complete(path):
+            raise ValueError
+        ovf = OvfFile(path)
+    except (ValueError, KeyError):
+        return dict(offset=-1, t=None, complete=False)
+    parms = dict(
+        shape=list(ovf.shape),
+        dtype=ovf.dtype.str,
+        format=ovf.format,
+        dx=ovf.dx,
+        dy=ovf.dy,
+        dz=ovf.dz,
+    )
+    return dict(offset=ovf.offset, t=ovf.t, complete=True, parms=parms)
+
+
+def ovf_header(shape, dx: float = 1e-9, dy: float = 1e-9, dz: float = 1e-9, binary: int = 4) -> str:
+    """OVF 2.0 header of a (z, y, x, comp) frame up to the data block, with
+    `{title}` and `{t}` left to format for each file"""
+    znodes, ynodes, xnodes, valuedim = shape
+    lines = [
+        "# OOMMF OVF 2.0",
+        "# Segment count: 1",
+        "# Begin: Segment",
+        "# Begin: Header",
+        "# Title: {title}",
+        "# meshtype: rectangular",
+        "# meshunit: m",
+        "# xmin: 0",
+        "# ymin: 0",
+        "# zmin: 0",
+        f"# xmax: {xnodes * dx}",
+        f"# ymax: {ynodes * dy}",
+        f"# zmax: {znodes * dz}",
+        f"# valuedim: {valuedim}",
+        "# valuelabels: x y z",
+        "# valueunits: 1 1 1",
+        "# Desc: Total simulation time:  {t}  s",
+        f"# xbase: {dx / 2}",
+        f"# ybase: {dy / 2}",
+        f"# zbase: {dz / 2}",
+        f"# xnodes: {xnodes}",
+        f"# ynodes: {ynodes}",
+        f"# znodes: {znodes}",
+        f"# xstepsize: {dx}",
+        f"# ystepsize: {dy}",
+        f"# zstepsize: {dz}",
+        "# End: Header",
+        f"# Begin: Data Binary {binary}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def write_ovf(path: str, arr: np.ndarray, header: str, title: str = "m", t: float = 0, binary: int = 4) -> None:
+    dtype = np.dtype(f"<f{binary}")
+    with open(path, "wb") as f:
+        f.write(header.format(title=title, t=t).encode("ASCII"))
+        f.write(np.array(CONTROL_NUMBERS[binary], dtype).tobytes())
+        # written through the buffer protocol, only copied when the dtype changes
+        f.write(np.ascontiguousarray(arr, dtype))
+        f.write(f"# End: Data Binary {binary}\n# End: Segment\n".encode("ASCII"))
+
+
+def export_ovf(
+    dset,
+    out_dir: str,
+    slices=(slice(None),),
+    dx: float = 1e-9,
+    dy: float = 1e-9,
+    dz: float = 1e-9,
+    binary: int = 4,
+    max_mem=2**30,
+    threads: int = 8,
+) -> int:
+    """Writes `dset[slices]` (a zarr array of (t, z, y, x, comp) frames) to
+    `out_dir/{i}.ovf`, reading it in time batches aligned to the zarr chunks
+    while the previous batch is written by a thread pool"""
+    slices = tuple(slices) + (slice(None),) * (dset.ndim - len(slices))
+    tslice, frame_slices = slices[0], slices[1:]
+    ts = range(*tslice.indices(dset.shape[0]))
+    frame_shape = tuple(len(range(*s.indices(n))) for s, n in zip(frame_slices, dset.shape[1:]))
+    frame_bytes = int(np.prod(frame_shape)) * max(binary, dset.dtype.itemsize)
+    # two batches are in memory at once, the one read and the one written
+    nframes = max(1, max_mem // (2 * frame_bytes))
+    tchunk = dset.chunks[0]
+    if tslice.step in (None, 1) and nframes > tchunk:
+        nframes -= nframes % tchunk
+    # strided slices make bigger cells
+    dz, dy, dx = [d * (s.step or 1) for d, s in zip((dz, dy, dx), frame_slices)]
+    header = ovf_header(frame_shape, dx, dy, dz, binary)
+    times = dset.attrs.get("t", None)
+    title = dset.path.split("/")[-1]
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        writing = []
+        for b in range(0, len(ts), nframes):
+            batch = ts[b : b + nframes]
+            arr = dset[(slice(batch.start, batch.stop, batch.step),) + frame_slices]
+            for w in writing:
+                w.result()
+            writing = [
+                pool.submit(
+                    write_ovf,
+                    f"{out_dir}/{b + i}.ovf",
+                    a,
+                    header,
+                    title,
+                    0 if times is None else times[t],
+                    binary,
+                )
+                for i, (t, a) in enumerate(zip(batch, arr))
+            ]
+        for w in writing:
+            w.result()
+    return len(ts)
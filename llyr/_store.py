@@ -0,0 +1,458 @@
+import atexit
+import hashlib
+import json
+import os
+import shutil
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from dask.utils import parse_bytes
+from zarr.storage import Store, getsize
+from zarr.util import json_dumps
+
+from ._cache import LRUCache
+
+META_KEYS = (".zarray", ".zgroup", ".zattrs")
+
+
+def _is_meta(key: str) -> bool:
+    return key.rsplit("/", 1)[-1] in META_KEYS
+
+
+class ConsolidatedStore(Store):
+    """Wraps a zarr store and serves all the metadata (.zgroup, .zarray, .zattrs)
+    from memory, loaded with a single read of `.zmetadata`. Metadata written
+    through this store goes to the wrapped store right away, `.zmetadata` is
+    removed at the first change and rewritten once by `flush`, `close` (or the
+    end of a `with` block) or at exit, so a crashed process leaves the folder to
+    be rescanned rather than a stale `.zmetadata`. Only the changes made through
+    this store are written, on top of the current `.zmetadata` (or a rescan),
+    so the ones of other processes are kept. Chunks are read and written
+    directly from the wrapped store."""
+
+    def __init__(self, store, rescan=False):
+        self.base = store
+        self.path = getattr(store, "path", "")
+        self._meta = {}
+        # metadata changes made through this store since the last write, in order:
+        # (key, value) set, (key, None) removed, (prefix, ...) folder removed
+        self._changes = []
+        self._dirty = False
+        # the .zmetadata of the stores already open on this folder must be current
+        for other in list(_open_stores.values()):
+            if other.path == self.path and other.base is not store:
+                other.flush()
+        _open_stores[id(self)] = self
+        if rescan or ".zmetadata" not in store:
+            self.consolidate()
+        else:
+            meta = json.loads(store[".zmetadata"])["metadata"]
+            self._meta = {k: json_dumps(v) for k, v in meta.items()}
+
+    def consolidate(self):
+        """Rescans the metadata of the wrapped store, e.g. after another process
+        wrote to it, and rewrites `.zmetadata`."""
+        self._meta = self._scan("", {})
+        self._write()
+        self._changes = []
+        self._dirty = False
+
+    def _scan(self, prefix: str, meta: dict) -> dict:
+        # array folders are not listed, they only hold chunks
+        for name in self.base.listdir(prefix.rstrip("/")):
+            key = f"{prefix}{name}"
+            if name in META_KEYS:
+                meta[key] = self.base[key]
+            elif f"{key}/.zarray" in self.base:
+                for m in META_KEYS:
+                    if f"{key}/{m}" in self.base:
+                        meta[f"{key}/{m}"] = self.base[f"{key}/{m}"]
+            elif not name.startswith("."):
+                self._scan(f"{key}/", meta)
+        return meta
+
+    def _changed(self):
+        if not self._dirty:
+            self._dirty = True
+            try:
+                del self.base[".zmetadata"]
+            except (KeyError, OSError, NotImplementedError):
+                pass
+
+    def flush(self):
+        """Writes `.zmetadata` if the metadata changed since the last write: the
+        changes made through this store are applied to the current `.zmetadata`,
+        which other processes may have rewritten meanwhile, or to a rescan"""
+        if not self._dirty:
+            return
+        try:
+            meta = json.loads(self.base[".zmetadata"])["metadata"]
+            meta = {k: json_dumps(v) for k, v in meta.items()}
+        except KeyError:
+            meta = self._scan("", {})
+        for key, value in self._changes:
+            if key.endswith("/") or key == "":
+                meta = {k: v for k, v in meta.items() if not k.startswith(key)}
+            elif value is None:
+                meta.pop(key, None)
+            else:
+                meta[key] = value
+        self._meta = meta
+        self._write()
+        self._changes = []
+        self._dirty = False
+
+    def _write(self):
+        meta = {k: json.loads(v) for k, v in self._meta.items()}
+        try:
+            self.base[".zmetadata"] = json_dumps(
+                {"zarr_consolidated_format": 1, "metadata": meta}
+            )
+        except (OSError, PermissionError, NotImplementedError):
+            pass  # read only stores keep the metadata in memory only
+
+    def __getitem__(self, key):
+        if _is_meta(key):
+            return self._meta[key]
+        return self.base[key]
+
+    def __contains__(self, key):
+        if _is_meta(key):
+            return key in self._meta
+        return key in self.base
+
+    def __setitem__(self, key, value):
+        self.base[key] = value
+        if _is_meta(key):
+            self._meta[key] = bytes(value)
+            self._changes.append((key, self._meta[key]))
+            self._changed()
+
+    def __delitem__(self, key):
+        del self.base[key]
+        if self._meta.pop(key, None) is not None:
+            self._changes.append((key, None))
+            self._changed()
+
+    def rmdir(self, path: str = ""):
+        path = path.strip("/")
+        self.base.rmdir(path)
+        prefix = f"{path}/" if path else ""
+        self._meta = {k: v for k, v in self._meta.items() if not k.startswith(prefix)}
+        self._changes.append((prefix, None))
+        self._changed()
+
+    def rename(self, src_path: str, dst_path: str):
+        src, dst = src_path.strip("/"), dst_path.strip("/")
+        self.base.rename(src, dst)
+        moved = {f"{dst}{k[len(src):]}": v for k, v in self._meta.items() if k.startswith(f"{src}/")}
+        self._meta = {k: v for k, v in self._meta.items() if not k.startswith(f"{src}/")}
+        self._meta.update(moved)
+        self._changes += [(f"{src}/", None)] + list(moved.items())
+        self._changed()
+
+    def listdir(self, path: str = ""):
+        path = path.strip("/")
+        prefix = f"{path}/" if path else ""
+        if f"{prefix}.zarray" in self._meta:
+            return self.base.listdir(path)
+        return sorted(
+            {k[len(prefix) :].split("/")[0] for k in self._meta if k.startswith(prefix)}
+        )
+
+    def getsize(self, path=None):
+        return getsize(self.base, path)
+
+    def keys(self):
+        return self.base.keys()
+
+    def __iter__(self):
+        return iter(self.base)
+
+    def __len__(self):
+        return len(self.base)
+
+    def close(self):
+        self.flush()
+        if hasattr(self.base, "close"):
+            self.base.close()
+
+
+# stores are mappings, so not hashable
+_open_stores = weakref.WeakValueDictionary()
+
+
+@atexit.register
+def _flush_open_stores():
+    for store in list(_open_stores.values()):
+        store.flush()
+
+
+def consolidate(path: str):
+    """Rewrites the `.zmetadata` of the zarr folder at `path`"""
+    from zarr.storage import DirectoryStore
+
+    ConsolidatedStore(DirectoryStore(path), rescan=True)
+
+
+class ChunkCache(Store):
+    """Read-through cache for the chunks of a remote store: decoded bytes are kept
+    in an in-memory LRU of `mem` bytes and in a folder of the user cache dir
+    limited to `disk` bytes (least recently used files evicted first), keyed by
+    the store url. The chunks of each array are kept under a stamp of its
+    `.zarray` and of the remote modification time of the latter, taken when the
+    metadata is read (open, `reload()`), so a rewritten array doesn't reuse old chunks.
+    On a miss the neighbouring chunks (+-1 along each axis) are fetched in the
+    background. Metadata always goes to the remote store; chunks written or
+    removed through this store are dropped from both tiers, `clear()` empties them."""
+
+    def __init__(self, store, mem="256MB", disk="4GB", prefetch=True):
+        from appdirs import user_cache_dir
+
+        self.base = store
+        self.path = getattr(store, "path", "")
+        self.url = getattr(store, "url", None) or str(self.path)
+        self.mem = LRUCache(mem)
+        self.disk_limit = parse_bytes(disk) if isinstance(disk, str) else int(disk)
+        name = hashlib.sha1(self.url.encode()).hexdigest()[:16]
+        self.root = os.path.join(user_cache_dir("llyr"), "chunks", name)
+        os.makedirs(self.root, exist_ok=True)
+        # disk entries (path relative to root -> size) in lru order, scanned once
+        self._files = OrderedDict()
+        for f in sorted(self._disk_files(), key=lambda f: os.stat(f).st_mtime):
+            self._files[os.path.relpath(f, self.root)] = os.path.getsize(f)
+        self.disk_bytes = sum(self._files.values())
+        self._lock = threading.Lock()
+        self._pool = None
+        if prefetch:
+            self._pool = ThreadPoolExecutor(2, thread_name_prefix="llyr-prefetch")
+            weakref.finalize(self, self._pool.shutdown, wait=False, cancel_futures=True)
+        self._pending = set()
+        self._arrays = {}
+
+    @property
+    def prefetch(self) -> bool:
+        return self._pool is not None
+
+    def _disk_files(self):
+        for root, _, files in os.walk(self.root):
+            for f in files:
+                if not f.endswith(".tmp"):
+                    yield os.path.join(root, f)
+
+    def _array(self, prefix: str):
+        """(chunk grid, stamp) of the array at `prefix`, read once"""
+        if prefix not in self._arrays:
+            meta = f"{prefix}/" if prefix else ""
+            try:
+                zarray = self.base[f"{meta}.zarray"]
+                shape = json.loads(zarray)
+                grid = [-(-s // c) for s, c in zip(shape["shape"], shape["chunks"])]
+            except (KeyError, ValueError):
+                self._arrays[prefix] = (None, "_")
+                return self._arrays[prefix]
+            try:
+                fs = self.base.fs
+                mtime = fs.info(f"{self.base.path}/{meta}.zarray").get("mtime")
+            except (AttributeError, NotImplementedError, OSError):
+                mtime = None
+            h = hashlib.sha1(bytes(zarray) + str(mtime).encode())
+            stamp = f"@{h.hexdigest()[:12]}"
+            self._arrays[prefix] = (grid, stamp)
+            self._drop_stamps(prefix, keep=stamp)
+        return self._arrays[prefix]
+
+    def _disk_key(self, key: str) -> str:
+        prefix, _, chunk = key.rpartition("/")
+        return os.path.join(*prefix.split("/"), self._array(prefix)[1], chunk)
+
+    def _load(self, key: str):
+        """Chunk from memory, else from disk, else None"""
+        rel = self._disk_key(key)
+        with self._lock:
+            value = self.mem.get(rel)
+        if value is not None:
+            return value
+        path = os.path.join(self.root, rel)
+        try:
+            with open(path, "rb") as f:
+                value = f.read()
+            # keeps the lru order for the next sessions
+            os.utime(path)
+        except OSError:
+            return None
+        with self._lock:
+            self.mem.put(rel, value, (key,))
+            if rel in self._files:
+                self._files.move_to_end(rel)
+        return value
+
+    def _save(self, key: str, value: bytes):
+        value = bytes(value)
+        rel = self._disk_key(key)
+        path = os.path.join(self.root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(value)
+        os.replace(tmp, path)
+        with self._lock:
+            self.mem.put(rel, value, (key,))
+            self.disk_bytes += len(value) - self._files.pop(rel, 0)
+            self._files[rel] = len(value)
+            evict = []
+            if self.disk_bytes > self.disk_limit:
+                while self.disk_bytes > 0.8 * self.disk_limit and len(self._files) > 1:
+                    old, size = self._files.popitem(last=False)
+                    self.disk_bytes -= size
+                    evict.append(old)
+        for old in evict:
+            try:
+                os.remove(os.path.join(self.root, old))
+            except OSError:
+                pass
+
+    def _neighbours(self, key: str):
+        prefix, _, chunk = key.rpartition("/")
+        sep = "." if "." in chunk else "/"
+        try:
+            idx = [int(i) for i in chunk.split(sep)]
+        except ValueError:
+            return []
+        grid = self._array(prefix)[0]
+        if grid is None or len(grid) != len(idx):
+            return []
+        out = []
+        for d in range(len(idx)):
+            for step in (-1, 1):
+                n = list(idx)
+                n[d] += step
+                if 0 <= n[d] < grid[d]:
+                    n = sep.join(map(str, n))
+                    out.append(f"{prefix}/{n}" if prefix else n)
+        return out
+
+    def _fetch(self, key: str):
+        try:
+            if self._load(key) is None:
+                self._save(key, self.base[key])
+        except KeyError:
+            pass
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def __getitem__(self, key):
+        if key.endswith(".zmetadata"):
+            # (re)opening the store: the arrays may have changed since
+            self._arrays.clear()
+            return self.base[key]
+        if _is_meta(key):
+            self._forget(key.rpartition("/")[0])
+            return self.base[key]
+        value = self._load(key)
+        if value is None:
+            value = self.base[key]
+            self._save(key, value)
+            if self.prefetch:
+                for n in self._neighbours(key):
+                    with self._lock:
+                        if n in self._pending or self._disk_key(n) in self.mem:
+                            continue
+                        self._pending.add(n)
+                    self._pool.submit(self._fetch, n)
+        return value
+
+    def __contains__(self, key):
+        return key in self.base
+
+    def _forget(self, path: str):
+        """Drops the stamps of the arrays at or below `path`"""
+        for prefix in list(self._arrays):
+            if not path or prefix == path or prefix.startswith(f"{path}/"):
+                self._arrays.pop(prefix, None)
+
+    def _remove(self, rel: str):
+        """Removes the disk entries at or below `rel` (relative to the root)"""
+        with self._lock:
+            if rel in self._files:
+                self.disk_bytes -= self._files.pop(rel)
+            else:
+                for f in [f for f in self._files if not rel or f.startswith(rel + os.sep)]:
+                    self.disk_bytes -= self._files.pop(f)
+        target = os.path.join(self.root, rel) if rel else self.root
+        if os.path.isdir(target):
+            shutil.rmtree(target, ignore_errors=True)
+        elif os.path.exists(target):
+            os.remove(target)
+
+    def _drop_stamps(self, prefix: str, keep: str):
+        folder = os.path.join(self.root, *prefix.split("/"))
+        if os.path.isdir(folder):
+            for name in os.listdir(folder):
+                if name.startswith("@") and name != keep:
+                    self._remove(os.path.relpath(os.path.join(folder, name), self.root))
+
+    def _drop(self, path: str):
+        path = path.strip("/")
+        with self._lock:
+            self.mem.invalidate(path)
+        if path and self._array(path.rpartition("/")[0])[0] is not None:
+            # a chunk of an array
+            self._remove(self._disk_key(path))
+        elif path:
+            self._remove(os.path.join(*path.split("/")))
+        else:
+            self._remove("")
+        self._forget(path)
+
+    def clear(self):
+        self._drop("")
+        os.makedirs(self.root, exist_ok=True)
+
+    def __setitem__(self, key, value):
+        self.base[key] = value
+        if _is_meta(key):
+            self._forget(key.rpartition("/")[0])
+        else:
+            self._drop(key)
+
+    def __delitem__(self, key):
+        del self.base[key]
+        if _is_meta(key):
+            self._forget(key.rpartition("/")[0])
+        else:
+            self._drop(key)
+
+    def rmdir(self, path: str = ""):
+        self.base.rmdir(path)
+        self._drop(path)
+
+    def rename(self, src_path: str, dst_path: str):
+        self.base.rename(src_path, dst_path)
+        self._drop(src_path)
+        self._drop(dst_path)
+
+    def listdir(self, path: str = ""):
+        return self.base.listdir(path)
+
+    def getsize(self, path=None):
+        return getsize(self.base, path)
+
+    def keys(self):
+        return self.base.keys()
+
+    def __iter__(self):
+        return iter(self.base)
+
+    def __len__(self):
+        return len(self.base)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        if hasattr(self.base, "close"):
+            self.base.close()
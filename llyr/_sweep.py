@@ -0,0 +1,82 @@
+import os
+from glob import glob
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+import zarr
+
+
+def _sweep_param(path: str):
+    try:
+        return float(os.path.basename(os.path.normpath(path)).replace(".zarr", ""))
+    except ValueError:
+        return None
+
+
+def _spectrum_mtime(path: str, dset: str) -> float:
+    p = f"{path}/fft/{dset}/max"
+    if not os.path.exists(f"{p}/.zarray"):
+        return -1.0
+    return max(os.stat(p).st_mtime, os.stat(f"{p}/.zarray").st_mtime)
+
+
+def _load_spectrum(args):
+    path, dset = args
+    g = zarr.open(path, "r")
+    return g[f"fft/{dset}/freqs"][:], g[f"fft/{dset}/max"][:]
+
+
+def sweep_to_zarr(path: str, dset: str = "m", out=None, threads: int = 16):
+    """Collects `fft/{dset}/max` of every `{path}/<param>.zarr` sim into
+    `{path}/sweep.zarr`: `params` (sim), `freqs` (f, GHz) and `spec` (sim, f, c).
+    Only the sims that are new or whose spectrum was recomputed since the last
+    call are read, in parallel. Spectra on another frequency axis than the first
+    sim are interpolated on it, when the first sim is new or recomputed all of
+    them are read again. Returns the sweep group."""
+    if out is None:
+        out = f"{path}/sweep.zarr"
+    sims = {}
+    for p in glob(f"{path}/*.zarr"):
+        param = _sweep_param(p)
+        mtime = _spectrum_mtime(p, dset)
+        if param is not None and mtime > 0:
+            sims[os.path.basename(p)] = (param, mtime)
+    names = sorted(sims, key=lambda n: sims[n][0])
+    if not names:
+        raise FileNotFoundError(f"No sim with 'fft/{dset}/max' in '{path}'")
+
+    sweep = zarr.open_group(out, "a")
+    old = sweep.attrs.get("mtimes", {}) if sweep.attrs.get("dset") == dset else {}
+    # the attrs are stored with sorted keys, the row order is kept in `names`
+    old_rows = {n: i for i, n in enumerate(sweep.attrs.get("names", []))}
+    todo = [n for n in names if n not in old or old[n] != sims[n][1]]
+    if not todo and list(old_rows) == names:
+        return sweep
+    if names[0] in todo or names[0] not in old_rows or "freqs" not in sweep:
+        # the frequency axis of the first sim changed, all the spectra are interpolated again
+        old, todo = {}, names
+
+    with ThreadPool(min(threads, max(1, len(todo)))) as pool:
+        loaded = dict(zip(todo, pool.map(_load_spectrum, [(f"{path}/{n}", dset) for n in todo])))
+    if "freqs" in sweep and old:
+        freqs = sweep["freqs"][:]
+        old_spec = sweep["spec"]
+    else:
+        freqs = (loaded.get(names[0]) or _load_spectrum((f"{path}/{names[0]}", dset)))[0]
+        old_spec = None
+    nc = next(iter(loaded.values()))[1].shape[1] if loaded else old_spec.shape[2]
+    spec = np.empty((len(names), len(freqs), nc), np.float32)
+    for i, n in enumerate(names):
+        if n in loaded:
+            f, s = loaded[n]
+            if len(f) != len(freqs) or not np.allclose(f, freqs):
+                s = np.stack([np.interp(freqs, f, s[:, c]) for c in range(nc)], axis=1)
+            spec[i] = s
+        else:
+            spec[i] = old_spec[old_rows[n]]
+    sweep.array("params", np.array([sims[n][0] for n in names]), overwrite=True)
+    sweep.array("freqs", freqs, overwrite=True)
+    sweep.array("spec", spec, chunks=(None, None, 1), overwrite=True)
+    sweep.attrs.update(dset=dset, names=names, mtimes={n: sims[n][1] for n in names})
+    print(f"{out}: {len(todo)} of {len(names)} sims read")
+    return sweep
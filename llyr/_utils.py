@@ -1,20 +1,26 @@
 import os
 import glob
 import multiprocessing as mp
-import re
 import colorsys
+import time
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import numpy.typing as npt
-from matplotlib import pyplot as plt
-import matplotlib as mpl
 import zarr
-import h5py
 from numcodecs import Blosc
-import IPython
+from dask.utils import parse_bytes
+
+from ._ovf import OvfFile, ovf_index, read_frame, ovf_header, write_ovf
+from ._codecs import ErrorBound
+from ._store import consolidate
 
 
 def fix_bg():
+    import IPython
+
     IPython.get_ipython().run_cell_magic(
         "html",
         "",
@@ -84,6 +90,10 @@ def clean_glob_names(ps):
 
 
 def cspectra_b(Llyr):
+    import matplotlib as mpl
+    import matplotlib.patches
+    from matplotlib import pyplot as plt
+
     def cspectra(ps, norm=None):
         cmaps = []
         for a, b, c in zip((1, 0, 0), (0, 1, 0), (0, 0, 1)):
@@ -148,100 +158,415 @@ def merge_table(m):
             del m[f"table/{d}z"]
 
 
-def h5_to_zarr(p, remove=False):
+def parse_table_header(line: str):
+    """Column names and units of a mumax table.txt header, x/y/z columns of the same
+    quantity are grouped like in `merge_table`"""
+    names, units = [], []
+    for col in line.lstrip("#").strip().split("\t"):
+        name, _, unit = col.strip().partition(" (")
+        names.append(name)
+        units.append(unit.rstrip(")"))
+    groups = []
+    i = 0
+    while i < len(names):
+        n = names[i]
+        if n.endswith("x") and names[i + 1 : i + 3] == [f"{n[:-1]}y", f"{n[:-1]}z"]:
+            groups.append((n[:-1], slice(i, i + 3), units[i]))
+            i += 3
+        else:
+            groups.append((n, slice(i, i + 1), units[i]))
+            i += 1
+    return names, groups
+
+
+def _parse_table_block(path: str, start: int, stop: int) -> np.ndarray:
+    with open(path, "rb") as f:
+        f.seek(start)
+        block = f.read(stop - start)
+    return np.fromstring(block.decode("ASCII"), sep=" ")
+
+
+def _table_blocks(path: str, start: int, block_size: int):
+    """Byte ranges of about `block_size` ending on line breaks, an unfinished last line is left out"""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        tail_start = max(start, f.tell() - 2**16)
+        f.seek(tail_start)
+        end = tail_start + f.read().rfind(b"\n") + 1
+        bounds = [start]
+        while bounds[-1] < end:
+            f.seek(bounds[-1] + block_size)
+            if f.tell() >= end:
+                bounds.append(end)
+            else:
+                f.readline()
+                bounds.append(f.tell())
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _table_continues(path: str, attrs) -> bool:
+    """False when the lines parsed so far are no longer at the start of the file,
+    e.g. it was truncated or rewritten by a restarted sim"""
+    offset = attrs.get("offset", 0)
+    last = attrs.get("last_line", "").encode("ASCII")
+    if offset > os.path.getsize(path) or offset < len(last):
+        return False
+    with open(path, "rb") as f:
+        f.seek(offset - len(last))
+        return f.read(len(last)) == last
+
+
+def table_to_zarr(
+    table_path: str, m, append: bool = False, pool=None, block_size="16MB"
+) -> int:
+    """Parses a mumax table.txt into one zarr array per column in the `table` group.
+
+    The file is parsed in blocks of `block_size` on the multiprocessing `pool`,
+    one is started if there are several blocks and no `pool` is given. The parse
+    costs about 1.5 s per 10^6 rows (7 columns) and per core, so it takes under a
+    second only with 2 or more cores. With `append=True` only the lines written
+    since the last call are parsed and appended, unless the file was truncated or
+    rewritten since, then it is parsed again from the start."""
+    with open(table_path, "r") as f:
+        header = f.readline()
+    names, groups = parse_table_header(header)
+    table = m.require_group("table")
+    if not append or table.attrs.get("columns") != names:
+        start = len(header.encode("ASCII"))
+        nrows = 0
+    elif not _table_continues(table_path, table.attrs):
+        print(f"{table_path} was truncated or rewritten, parsing it again")
+        start = len(header.encode("ASCII"))
+        nrows = 0
+    else:
+        start = table.attrs["offset"]
+        nrows = table.attrs["rows"]
+    blocks = _table_blocks(table_path, start, parse_bytes(block_size))
+    if len(blocks) == 0:
+        return 0
+    if len(blocks) == 1:
+        arrs = [_parse_table_block(table_path, *blocks[0])]
+    elif pool is None:
+        with mp.Pool(min(len(blocks), max(1, mp.cpu_count() - 1))) as pool:
+            arrs = pool.starmap(_parse_table_block, [(table_path, *b) for b in blocks])
+    else:
+        arrs = pool.starmap(_parse_table_block, [(table_path, *b) for b in blocks])
+    arr = np.concatenate(arrs)
+    if arr.size % len(names):
+        raise ValueError(f"'{table_path}' does not have {len(names)} values on every line")
+    arr = arr.reshape(-1, len(names))
+    for name, cols, unit in groups:
+        data = arr[:, cols] if cols.stop - cols.start > 1 else arr[:, cols.start]
+        if nrows > 0:
+            dset = table[name]
+            dset.resize((nrows + data.shape[0],) + data.shape[1:])
+            dset[nrows:] = data
+        else:
+            dset = table.create_dataset(
+                name, data=data, chunks=(2**16,) + data.shape[1:], overwrite=True
+            )
+            dset.attrs["unit"] = unit
+    end = blocks[-1][1]
+    with open(table_path, "rb") as f:
+        f.seek(max(blocks[-1][0], end - 4096))
+        tail = f.read(end - f.tell())
+    last_line = tail[tail.rstrip(b"\n").rfind(b"\n") + 1 :].decode("ASCII")
+    table.attrs.update(
+        columns=names, offset=end, rows=nrows + arr.shape[0], last_line=last_line
+    )
+    return arr.shape[0]
+
+
+def chunk_batches(shape, chunks, itemsize: int, max_bytes: int):
+    """Slices covering `shape` made of whole chunks and of at most `max_bytes`
+    (but at least one chunk), grown along the leading axes first"""
+    block = list(chunks)
+    nbytes = itemsize * int(np.prod(chunks))
+    for ax in range(len(shape)):
+        nchunks = -(-shape[ax] // chunks[ax])
+        n = max(1, min(nchunks, max_bytes // nbytes))
+        block[ax] = chunks[ax] * n
+        nbytes *= n
+        if n < nchunks:
+            break
+    starts = itertools.product(*[range(0, s, b) for s, b in zip(shape, block)])
+    return [tuple(slice(i, min(i + b, s)) for i, b, s in zip(st, block, shape)) for st in starts]
+
+
+def _h5_attrs(obj) -> dict:
+    attrs = {}
+    for k, v in obj.attrs.items():
+        if isinstance(v, bytes):
+            v = v.decode()
+        elif isinstance(v, (np.ndarray, np.generic)):
+            v = v.tolist()
+        attrs[k] = v
+    return attrs
+
+
+_h5_files: dict = {}
+
+
+def _copy_h5_batch(args) -> int:
+    h5_path, zarr_path, name, slices = args
+    if h5_path not in _h5_files:
+        import h5py
+
+        _h5_files[h5_path] = h5py.File(h5_path, "r")
+    arr = _h5_files[h5_path][name][slices]
+    zarr.open_array(zarr_path, mode="r+", path=name)[slices] = arr
+    return arr.nbytes
+
+
+def h5_to_zarr(
+    p,
+    remove=False,
+    chunks=None,
+    compressor=Blosc(cname="zstd", clevel=1, shuffle=Blosc.SHUFFLE),
+    max_mem="1GB",
+    processes=None,
+):
+    """Converts a .h5 file to a .zarr group next to it.
+
+    Datasets are written straight with the given `chunks` (a tuple applied to
+    every dataset of matching dimension, or a dict of tuples by dataset name,
+    the h5 chunks are kept otherwise) and `compressor`. Large datasets are
+    copied in batches of whole target chunks by a pool of processes, holding
+    at most `max_mem` in memory in total."""
+    import h5py
+
+    zarr_path = p.replace(".h5", ".zarr")
     source = h5py.File(p, "r")
-    dest = zarr.open(p.replace(".h5", ".zarr"), mode="a")
+    dest = zarr.open(zarr_path, mode="a")
+    dest.attrs.update(_h5_attrs(source))
+    dsets = []
+
+    def visit(name, obj):
+        if isinstance(obj, h5py.Group):
+            dest.require_group(name).attrs.update(_h5_attrs(obj))
+        else:
+            dsets.append(name)
+
+    source.visititems(visit)
+    if processes is None:
+        processes = max(1, mp.cpu_count() - 1)
+    max_bytes = parse_bytes(max_mem) // processes
     print("Copying:", p)
-    zarr.copy_all(source, dest)
+    start = time.perf_counter()
+    total = 0
+    batches = []
+    for name in dsets:
+        h5_dset = source[name]
+        if isinstance(chunks, dict):
+            dset_chunks = chunks.get(name, h5_dset.chunks or True)
+        elif chunks is not None and len(chunks) == h5_dset.ndim:
+            dset_chunks = tuple(chunks)
+        else:
+            dset_chunks = h5_dset.chunks or True
+        zarr_dset = dest.create_dataset(
+            name,
+            shape=h5_dset.shape,
+            chunks=dset_chunks,
+            dtype=h5_dset.dtype,
+            compressor=compressor,
+            overwrite=True,
+        )
+        zarr_dset.attrs.update(_h5_attrs(h5_dset))
+        total += h5_dset.nbytes
+        if h5_dset.nbytes <= max_bytes:
+            zarr_dset[...] = h5_dset[...]
+        else:
+            batches += [
+                (p, zarr_path, name, s)
+                for s in chunk_batches(
+                    h5_dset.shape, zarr_dset.chunks, h5_dset.dtype.itemsize, max_bytes
+                )
+            ]
+    source.close()
+    if batches:
+        with mp.Pool(processes=processes) as pool:
+            pool.map(_copy_h5_batch, batches, chunksize=1)
+    duration = time.perf_counter() - start
+    print(
+        f"{p}: {len(dsets)} datasets ({total / 1e9:.2f} GB) in {duration:.1f} s"
+        f" ({total / max(duration, 1e-9) / 1e6:.0f} MB/s)"
+    )
     print("Merging tables ..")
     merge_table(dest)
-    source.close()
-    print("Removing ...")
+    consolidate(zarr_path)
     if remove:
+        print("Removing ...")
         os.remove(p)
     print("Done")
 
 
 def load_ovf(path: str):
-    with open(path, "rb") as f:
-        dims = np.array([0, 0, 0, 0])
-        while True:
-            line = f.readline().strip().decode("ASCII")
-            if "valuedim" in line:
-                dims[3] = int(line.split(" ")[-1])
-            if "xnodes" in line:
-                dims[2] = int(line.split(" ")[-1])
-            if "ynodes" in line:
-                dims[1] = int(line.split(" ")[-1])
-            if "znodes" in line:
-                dims[0] = int(line.split(" ")[-1])
-            if "Begin: Data" in line:
-                break
-        count = int(dims[0] * dims[1] * dims[2] * dims[3] + 1)
-        arr = np.fromfile(f, "<f4", count=count)[1:].reshape(dims)
-    return arr
+    return np.asarray(OvfFile(path).data, dtype=np.float32)
 
 
 def get_ovf_parms(path: str):
-    with open(path, "rb") as f:
-        parms = {}
-        while True:
-            line = f.readline().strip().decode("ASCII")
-            if "valuedim" in line:
-                parms["comp"] = int(line.split(" ")[-1])
-            if "xnodes" in line:
-                parms["Nx"] = int(line.split(" ")[-1])
-            if "ynodes" in line:
-                parms["Ny"] = int(line.split(" ")[-1])
-            if "znodes" in line:
-                parms["Nz"] = int(line.split(" ")[-1])
-            if "xstepsize" in line:
-                parms["dx"] = float(line.split(" ")[-1])
-            if "ystepsize" in line:
-                parms["dy"] = float(line.split(" ")[-1])
-            if "zstepsize" in line:
-                parms["dz"] = float(line.split(" ")[-1])
-            if "Begin: Data" in line:
-                break
-    return parms
-
-
-def out_to_zarr(out_path: str, zarr_path: str, tmax=None):
-    r = re.compile(r"(.*)(\d{6})")
-    ovfs = sorted(glob.glob(f"{out_path}/*.ovf"))
-    ovfs = [p.split("/")[-1].replace(".ovf", "") for p in ovfs]
-    dsets = []
-    for ovf in ovfs:
-        m = r.match(ovf)
-        if m:
-            dset = m.groups()[0]
-        else:
-            dset = ovf
-        if dset not in dsets:
-            dsets.append(dset)
+    return OvfFile(path).parms
+
+
+def ingest_ovfs(
+    ovfs, zarr_dset, pool, max_mem="1GB", offset: int = 0, loader=load_ovf
+):
+    """Writes the frames returned by `loader(*args)` for each args tuple in `ovfs` to
+    `zarr_dset[offset:]` one whole chunk at a time, keeping at most `max_mem` of
+    decoded frames in flight. Returns the float64 sums of each frame and component."""
+    tchunk = zarr_dset.chunks[0]
+    chunk_nbytes = tchunk * int(np.prod(zarr_dset.shape[1:])) * zarr_dset.dtype.itemsize
+    inflight = max(1, parse_bytes(max_mem) // (2 * chunk_nbytes))
+    # the first batch only completes the chunk left partially filled by a previous ingest
+    first = offset - offset % tchunk + tchunk
+    bounds = [0] + list(range(first - offset, len(ovfs), tchunk)) + [len(ovfs)]
+    start = time.perf_counter()
+    decoding = deque()
+    writing = deque()
+    sums = []
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        for i0, i1 in zip(bounds[:-1], bounds[1:]):
+            decoding.append((offset + i0, pool.starmap_async(loader, ovfs[i0:i1])))
+            if len(decoding) < inflight:
+                continue
+            i, res = decoding.popleft()
+            writing.append(writer.submit(_write_frames, zarr_dset, i, res.get()))
+            while len(writing) > inflight:
+                sums.append(writing.popleft().result())
+        while decoding:
+            i, res = decoding.popleft()
+            writing.append(writer.submit(_write_frames, zarr_dset, i, res.get()))
+        for w in writing:
+            sums.append(w.result())
+    duration = time.perf_counter() - start
+    print(
+        f"{zarr_dset.path}: {len(ovfs)} frames in {duration:.1f} s"
+        f" ({len(ovfs) / duration:.1f} frames/s)"
+    )
+    return np.concatenate(sums)
+
+
+def _write_frames(zarr_dset, i: int, frames) -> np.ndarray:
+    frames = np.stack(frames)
+    zarr_dset[i : i + len(frames)] = frames
+    return frames.sum(axis=(1, 2, 3), dtype=np.float64)
+
+
+def frame_sums(dset) -> np.ndarray:
+    """Float64 sums of each frame and component of a (t, z, y, x, c) dataset, as
+    recorded at ingest, or computed once and kept in its `sums` attribute"""
+    sums = dset.attrs.get("sums", [])
+    if len(sums) != dset.shape[0]:
+        import dask.array as da
+
+        sums = da.from_zarr(dset).sum(axis=(1, 2, 3), dtype=np.float64).compute()
+        dset.attrs["sums"] = sums.tolist()
+    return np.array(sums)
+
+
+def out_to_zarr(
+    out_path: str,
+    zarr_path: str,
+    tmax=None,
+    max_mem="1GB",
+    processes=None,
+    append: bool = False,
+    error_bound=None,
+) -> int:
+    """Ingests the ovf files and table.txt of a mumax output folder, with `append=True`
+    only the files not yet recorded in the `ovfs` attribute of each dataset and
+    the new table lines are read. With `error_bound` (a float, or a dict by
+    dataset name) the frames are stored lossily within that absolute error."""
+    index = ovf_index(out_path)
     m = zarr.open(zarr_path)
-    for dset in dsets:
-        ovfs = sorted(glob.glob(f"{out_path}/{dset}*.ovf"))[:tmax]
-        parms = get_ovf_parms(ovfs[0])
-        dset_shape = (len(ovfs), parms["Nz"], parms["Ny"], parms["Nx"], parms["comp"])
-        zarr_dset = m.create_dataset(
-            dset,
-            shape=dset_shape,
-            chunks=(5, parms["Nz"], 64, 64, parms["comp"]),
-            dtype=np.float32,
-            compressor=Blosc(cname="zstd", clevel=1, shuffle=Blosc.SHUFFLE),
-            overwrite=True,
-        )
-        pool = mp.Pool(processes=int(mp.cpu_count() - 1))
-        for i, d in enumerate(pool.imap(load_ovf, ovfs)):
-            zarr_dset[i] = d
+    if processes is None:
+        processes = max(1, mp.cpu_count() - 1)
+    new_frames = 0
+    with mp.Pool(processes=processes) as pool:
+        for dset, d in index["dsets"].items():
+            # frames after one that is still being written are left for the next call
+            n = d["complete"].index(False) if False in d["complete"] else len(d["files"])
+            n = min(n, len(d["files"][:tmax]))
+            if n == 0:
+                continue
+            frame_shape = tuple(d["shape"])
+            rows = list(zip(d["files"][:n], d["offsets"][:n], d["t"][:n]))
+            if append and dset in m:
+                zarr_dset = m[dset]
+                if zarr_dset.shape[1:] != frame_shape:
+                    raise ValueError(
+                        f"Can't append to '{dset}': frame shape {frame_shape} != {zarr_dset.shape[1:]}"
+                    )
+                ovfs = zarr_dset.attrs.get("ovfs")
+                if ovfs is None or len(ovfs) > zarr_dset.shape[0]:
+                    raise ValueError(
+                        f"Can't append to '{dset}': its 'ovfs' attribute doesn't list its frames,"
+                        " ingest it again without append"
+                    )
+                done = set(ovfs)
+                rows = [r for r in rows if r[0] not in done]
+                if len(rows) == 0:
+                    continue
+                # frames past the recorded ones are left from an interrupted append
+                offset = len(ovfs)
+                zarr_dset.resize((offset + len(rows),) + frame_shape)
+            else:
+                offset = 0
+                eb = error_bound.get(dset) if isinstance(error_bound, dict) else error_bound
+                zarr_dset = m.create_dataset(
+                    dset,
+                    shape=(len(rows),) + frame_shape,
+                    chunks=(5, frame_shape[0], 64, 64, frame_shape[3]),
+                    dtype=np.float32,
+                    compressor=Blosc(cname="zstd", clevel=1, shuffle=Blosc.SHUFFLE),
+                    filters=None if eb is None else [ErrorBound(eb, "<f4")],
+                    overwrite=True,
+                )
+            if d["format"] == "Text":
+                args = [(f"{out_path}/{r[0]}",) for r in rows]
+                sums = ingest_ovfs(args, zarr_dset, pool, max_mem, offset)
+            else:
+                args = [(f"{out_path}/{r[0]}", r[1], d["dtype"], frame_shape) for r in rows]
+                sums = ingest_ovfs(args, zarr_dset, pool, max_mem, offset, read_frame)
+            # recorded only once the frames are written so an interrupted ingest is redone
+            attrs = zarr_dset.attrs.asdict()
+            zarr_dset.attrs.update(
+                ovfs=attrs.get("ovfs", [])[:offset] + [r[0] for r in rows],
+                t=attrs.get("t", [])[:offset] + [r[2] for r in rows],
+                sums=attrs.get("sums", [])[:offset] + sums.tolist(),
+            )
+            new_frames += len(rows)
+        if os.path.exists(f"{out_path}/table.txt"):
+            table_to_zarr(f"{out_path}/table.txt", m, append, pool)
+    consolidate(zarr_path)
+    return new_frames
+
+
+def watch_out(
+    out_path: str, zarr_path: str, interval: float = 10, timeout=None, **kwargs
+) -> None:
+    """Keeps appending the new ovf files and table.txt lines of a running simulation
+    to the zarr group, stops after `timeout` seconds without new frames or table
+    rows (never if None)"""
+    last = time.monotonic()
+    rows = 0
+    while True:
+        frames = out_to_zarr(out_path, zarr_path, append=True, **kwargs)
+        table = zarr.open(zarr_path, "r").get("table")
+        new_rows = 0 if table is None else table.attrs.get("rows", 0)
+        if frames > 0 or new_rows != rows:
+            last = time.monotonic()
+            rows = new_rows
+        elif timeout is not None and time.monotonic() - last > timeout:
+            break
+        time.sleep(interval)
 
 
 def get_b(x):
     return float(x.split("_")[-1].replace(".ovf", ""))
 
 
-def out_to_zarr2(path: str):
+def out_to_zarr2(path: str, max_mem="1GB", processes=None):
     m = zarr.open(f"{path}.zarr")
     ovfs = sorted(glob.glob(f"{path}/m*.ovf"), key=get_b, reverse=False)
     parms = get_ovf_parms(ovfs[0])
@@ -254,44 +579,41 @@ def out_to_zarr2(path: str):
         compressor=Blosc(cname="zstd", clevel=1, shuffle=Blosc.SHUFFLE),
         overwrite=True,
     )
-    pool = mp.Pool(processes=int(mp.cpu_count() - 1))
-    for i, d in enumerate(pool.imap(load_ovf, ovfs)):
-        zarr_dset[i] = d
+    if processes is None:
+        processes = max(1, mp.cpu_count() - 1)
+    with mp.Pool(processes=processes) as pool:
+        ingest_ovfs([(p,) for p in ovfs], zarr_dset, pool, max_mem)
     zarr_dset.attrs["B_ext"] = [get_b(ovf) for ovf in ovfs]
 
 
-def rechunk():
-    import rechunker
-    import zarr
-    import shutil
-
-    # paths = glob("./ADL_paper/*/*.zarr")
-    paths = ["./ADL_paper/ref.zarr"]
-    intermediate = "/tmp/intermediate.zarr"
-    for p in paths:
-        print(p)
-        source = zarr.open(p).m
-        # source = zarr.open(p).modes.m.arr
-        if source.shape == (501, 1, 512, 512, 3):
-            # if source.shape == (251, 1, 512, 512, 3):
-            target = f"{p}/m3"
-            # target = f"{p}/modes/m/arr2"
-            rechunked = rechunker.rechunk(
-                source,
-                target_chunks=(1, 1, 64, 64, 3),
-                max_mem="40GB",
-                target_store=target,
-                temp_store=intermediate,
-            )
-            rechunked.execute()
-            # shutil.rmtree(f"{p}/modes/m/arr")
-            # zarr.open(p).move("m2","m")
-            # zarr.open(p).move("modes/m/arr2","modes/m/arr")
-        else:
-            print("Wrong shape ?")
+def rechunk(source, dest, max_mem="1GB") -> None:
+    """Copies the array `source` into the array `dest` of the same shape but other
+    chunks, in batches of whole `dest` chunks holding at most `max_mem`"""
+    max_bytes = parse_bytes(max_mem)
+    itemsize = source.dtype.itemsize
+    # zarr also decodes one source and one dest chunk next to the batch
+    chunk_bytes = [
+        itemsize * np.prod(np.minimum(a.chunks, a.shape)) for a in (source, dest)
+    ]
+    overhead = sum(chunk_bytes)
+    if chunk_bytes[1] + overhead > max_bytes:
+        raise ValueError(
+            f"A chunk of {dest.chunks} doesn't fit in max_mem={max_mem}, use smaller chunks"
+        )
+    batches = chunk_batches(dest.shape, dest.chunks, itemsize, max_bytes - overhead)
+    start = time.perf_counter()
+    for slices in batches:
+        dest[slices] = source[slices]
+    duration = time.perf_counter() - start
+    print(
+        f"Rechunked {source.path} to {dest.chunks} in {duration:.1f} s"
+        f" ({source.nbytes / duration / 1e6:.0f} MB/s)"
+    )
 
 
 def make_cmap(min_color, max_color, N):
+    import matplotlib as mpl
+
     cmap = np.ones((N, 4))
     for i in range(4):
         cmap[:, i] = np.linspace(min_color[i], max_color[i], N) / 256
@@ -299,6 +621,9 @@ def make_cmap(min_color, max_color, N):
 
 
 def get_cmaps():
+    import matplotlib as mpl
+    import matplotlib.patches
+
     cmaps = []
     for a, b, c in zip((1, 0, 0), (0, 1, 0), (0, 0, 1)):
         N = 256
@@ -316,71 +641,17 @@ def get_cmaps():
     return cmaps, handles
 
 
-class MidpointNormalize(mpl.colors.Normalize):
-    def __init__(self, vmin=None, vmax=None, midpoint=0.0, clip=False):
-        self.midpoint = midpoint
-        mpl.colors.Normalize.__init__(self, vmin, vmax, clip)
-
-    def __call__(self, value, clip=None):
-        x, y = [self.vmin, self.midpoint, self.vmax], [0, 0.5, 1]
-        return np.ma.masked_array(np.interp(value, x, y))
-
-
-import struct
-
-
-def save_ovf(path: str, arr: np.ndarray, dx: float=1e-9, dy: float=1e-9, dz: float=1e-9) -> None:
+def save_ovf(
+    path: str,
+    arr: np.ndarray,
+    dx: float = 1e-9,
+    dy: float = 1e-9,
+    dz: float = 1e-9,
+    binary: int = 4,
+) -> None:
     """Saves the given dataset for a given t to a valid OOMMF V2 ovf file"""
-
-    def whd(s):
-        s += "\n"
-        f.write(s.encode("ASCII"))
-
-    out = arr.astype("<f4")
-    out = out.tobytes()
-
-    xnodes, ynodes, znodes = arr.shape[2], arr.shape[1], arr.shape[0]
-    xmin, ymin, zmin = 0, 0, 0
-    xmax, ymax, zmax = xnodes * dx, ynodes * dy, znodes * dz
-    xbase, ybase, _ = dx / 2, dy / 2, dz / 2
-    valuedim = arr.shape[-1]
-    valuelabels = "x y z"
-    valueunits = "1 1 1"
-    total_sim_time = "0"
-    name = path.split("/")[-1]
-    with open(path, "wb") as f:
-        whd("# OOMMF OVF 2.0")
-        whd("# Segment count: 1")
-        whd("# Begin: Segment")
-        whd("# Begin: Header")
-        whd(f"# Title: {name}")
-        whd("# meshtype: rectangular")
-        whd("# meshunit: m")
-        whd(f"# xmin: {xmin}")
-        whd(f"# ymin: {ymin}")
-        whd(f"# zmin: {zmin}")
-        whd(f"# xmax: {xmax}")
-        whd(f"# ymax: {ymax}")
-        whd(f"# zmax: {zmax}")
-        whd(f"# valuedim: {valuedim}")
-        whd(f"# valuelabels: {valuelabels}")
-        whd(f"# valueunits: {valueunits}")
-        whd(f"# Desc: Total simulation time:  {total_sim_time}  s")
-        whd(f"# xbase: {xbase}")
-        whd(f"# ybase: {ybase}")
-        whd(f"# zbase: {ybase}")
-        whd(f"# xnodes: {xnodes}")
-        whd(f"# ynodes: {ynodes}")
-        whd(f"# znodes: {znodes}")
-        whd(f"# xstepsize: {dx}")
-        whd(f"# ystepsize: {dy}")
-        whd(f"# zstepsize: {dz}")
-        whd("# End: Header")
-        whd("# Begin: Data Binary 4")
-        f.write(struct.pack("<f", 1234567.0))
-        f.write(out)
-        whd("# End: Data Binary 4")
-        whd("# End: Segment")
+    header = ovf_header(arr.shape, dx, dy, dz, binary)
+    write_ovf(path, arr, header, path.split("/")[-1], 0, binary)
 
 
 def trans_ax_to_data(ax, rec):
@@ -402,7 +673,9 @@ def add_radial_phase_colormap(ax, rec=None):
         rec = [0.03, 0.03, 0.25, 0.25]
     cax = ax.inset_axes(rec)
     cax.axis("off")
-    im = mpl.image.imread(legend)
+    import matplotlib.image
+
+    im = matplotlib.image.imread(legend)
     cax.imshow(im, origin="upper")
 
 
@@ -410,6 +683,8 @@ def add_radial_phase_colormap2(ax, rec=None):
     def func1(hsl):
         return np.array(colorsys.hls_to_rgb(hsl[0] / (2 * np.pi), hsl[1], hsl[2]))
 
+    from matplotlib import pyplot as plt
+
     if rec is None:
         rec = [0.85, 0.85, 0.15, 0.15]
     cax = plt.axes(rec, polar=True)
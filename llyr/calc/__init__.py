@@ -1,26 +1,53 @@
-from .disp import disp
-from .fft_tb import fft_tb
-from .fft import fft
-from .modes import modes
-from .hyst import hyst
-from .bad_modes import bad_modes
-from .sk_number import sk_number
-from .peaks import peaks
-from .fminmax import fminmax
-from .anim import anim
+import sys
+from importlib import import_module
+
+from .._lazy import LazyPackage
+
+# attribute: (module, class, method), the modules are imported on first use
+_methods = {
+    "disp": ("disp", "disp", "calc"),
+    "disp_da": ("disp", "disp", "calc"),
+    "disp3d": ("disp3d", "disp3d", "calc"),
+    "kpath": ("disp3d", "disp3d", "kpath"),
+    "fft_tb": ("fft_tb", "fft_tb", "calc"),
+    "fft": ("fft", "fft", "calc"),
+    "modes": ("modes", "modes", "calc"),
+    "lazy_modes": ("lazy_modes", "lazy_modes", "calc"),
+    "hyst": ("hyst", "hyst", "calc"),
+    "bad_modes": ("bad_modes", "bad_modes", "calc"),
+    "sk_number": ("sk_number", "sk_number", "calc"),
+    "peaks": ("peaks", "peaks", "calc"),
+    "npeaks": ("peaks", "peaks", "npeaks"),
+    "find_peaks": ("peaks", "find_peaks", None),
+    "fminmax": ("fminmax", "fminmax", "calc"),
+    "anim": ("anim", "anim", "calc"),
+    "compression": ("compression", "compression", "calc"),
+    "spectrogram": ("spectrogram", "spectrogram", "calc"),
+}
+
+
+def __getattr__(name):
+    for module, cls, _ in _methods.values():
+        if cls == name:
+            return getattr(import_module(f".{module}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+sys.modules[__name__].__class__ = LazyPackage
 
 
 class Calc:
     def __init__(self, llyr):
-        self.disp = disp(llyr).calc
-        self.disp_da = disp(llyr).calc_da
-        self.fft_tb = fft_tb(llyr).calc
-        self.fft = fft(llyr).calc
-        self.modes = modes(llyr).calc
-        self.hyst = hyst(llyr).calc
-        self.bad_modes = bad_modes(llyr).calc
-        self.sk_number = sk_number(llyr).calc
-        self.peaks = peaks(llyr).calc
-        self.npeaks = peaks(llyr).npeaks
-        self.fminmax = fminmax(llyr).calc
-        self.anim = anim(llyr).calc
+        self._llyr = llyr
+
+    def __getattr__(self, name):
+        if name not in _methods:
+            raise AttributeError(f"'Calc' object has no attribute {name!r}")
+        module, cls, method = _methods[name]
+        obj = getattr(import_module(f".{module}", __package__), cls)
+        value = obj if method is None else getattr(obj(self._llyr), method)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(_methods)
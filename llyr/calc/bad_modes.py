@@ -1,6 +1,7 @@
 import numpy as np
 import dask.array as da
 
+from .._fft import dask_fft
 from ..base import Base
 
 
@@ -9,7 +10,7 @@ class bad_modes(Base):
         if name is None:
             name = dset
         self.m.rm(f"fft_bad/{name}/sum")
-        x1 = da.from_zarr(self.m[dset])
+        x1 = da.from_zarr(self.m[dset]).astype(self.m.float_dtype)
         if slices[0] == slice(None):
             slices = list(slices)
             slices[0] = slice(None, self.m[dset].shape[0])
@@ -17,10 +18,12 @@ class bad_modes(Base):
         x1 = x1[slices]
         if "stable" in self.m:
             x1 -= da.from_zarr(self.m.stable)[:1]
-        x1 = x1.rechunk((x1.shape[0], 1, 64, 64, x1.shape[-1]))
-        x1 -= da.average(x1)
-        x1 = x1 * np.hanning(x1.shape[0])[:, None, None, None, None]
-        x1 = np.fft.rfft(x1, axis=0)
+        if len(x1.chunks[0]) > 1:
+            # datasets stored time contiguous with `Group.rechunk` skip this step
+            x1 = x1.rechunk((x1.shape[0], 1, 64, 64, x1.shape[-1]))
+        x1 = x1 - da.average(x1).astype(self.m.float_dtype)
+        x1 = x1 * np.hanning(x1.shape[0]).astype(self.m.float_dtype)[:, None, None, None, None]
+        x1 = dask_fft("rfft")(x1, axis=0)
         x1 = da.absolute(x1)
         fft_max = da.sum(x1, axis=(1, 2, 3))
         da.to_zarr(
@@ -29,7 +32,7 @@ class bad_modes(Base):
                 f"fft/{name}/bad",
                 shape=fft_max.shape,
                 chunks=None,
-                dtype=np.float32,
+                dtype=self.m.float_dtype,
             ),
         )
         ts = self.m.m.attrs["t"][slices[0]]
@@ -0,0 +1,92 @@
+import time
+from collections import namedtuple
+
+import numpy as np
+from numcodecs import Blosc
+
+from .._codecs import TimeDelta
+from ..base import Base
+
+
+class compression(Base):
+    def candidates(self, dset: str):
+        arr = self.m[dset]
+        stride = int(np.prod(arr.chunks[1:]))
+        delta = [TimeDelta(stride, arr.dtype.str)] if arr.ndim > 1 else None
+        out = []
+        for cname, clevel in [("lz4", 1), ("lz4", 5), ("zstd", 1), ("zstd", 3), ("zstd", 5)]:
+            for shuffle, sname in [(Blosc.SHUFFLE, "shuffle"), (Blosc.BITSHUFFLE, "bitshuffle")]:
+                compressor = Blosc(cname=cname, clevel=clevel, shuffle=shuffle)
+                out.append((f"{cname}-{clevel} {sname}", compressor, None))
+                if delta is not None and clevel < 5:
+                    out.append((f"{cname}-{clevel} {sname} time-delta", compressor, delta))
+        return out
+
+    def calc(
+        self,
+        dset: str = "m",
+        nsamples: int = 4,
+        target_speed: float = 500,
+        candidates=None,
+        apply: bool = False,
+        max_mem="1GB",
+    ):
+        """Measures the compression ratio and encode/decode speed (MB/s of raw data)
+        of each candidate (label, compressor, filters) on `nsamples` chunks of
+        `dset` spread over the array. The best is the one with the highest ratio
+        decoding at least at `target_speed` MB/s (else the fastest decoder), with
+        `apply=True` the dataset is rewritten with it"""
+        arr = self.m[dset]
+        if candidates is None:
+            candidates = self.candidates(dset)
+        grid = [range(0, s, c) for s, c in zip(arr.shape, arr.chunks)]
+        nchunks = int(np.prod([len(g) for g in grid]))
+        samples = []
+        for i in np.unique(np.linspace(0, nchunks - 1, nsamples).astype(int)):
+            idx = np.unravel_index(i, [len(g) for g in grid])
+            slices = tuple(slice(g[j], g[j] + c) for g, j, c in zip(grid, idx, arr.chunks))
+            sample = np.zeros(arr.chunks, arr.dtype)
+            chunk = arr[slices]
+            sample[tuple(slice(0, s) for s in chunk.shape)] = chunk
+            samples.append(sample)
+        raw = sum(s.nbytes for s in samples)
+        Result = namedtuple("Result", "label ratio encode decode compressor filters")
+        results = []
+        for label, compressor, filters in candidates:
+            filters = filters or []
+            start = time.perf_counter()
+            encoded = []
+            for s in samples:
+                for f in filters:
+                    s = f.encode(s)
+                encoded.append(compressor.encode(s))
+            encode = time.perf_counter() - start
+            start = time.perf_counter()
+            for e in encoded:
+                e = compressor.decode(e)
+                for f in filters[::-1]:
+                    e = f.decode(e)
+            decode = time.perf_counter() - start
+            results.append(
+                Result(
+                    label,
+                    raw / sum(len(e) for e in encoded),
+                    raw / encode / 1e6,
+                    raw / decode / 1e6,
+                    compressor,
+                    filters or None,
+                )
+            )
+        for r in results:
+            print(f"{r.label:<28} ratio {r.ratio:5.2f}  encode {r.encode:7.0f} MB/s  decode {r.decode:7.0f} MB/s")
+        fast = [r for r in results if r.decode >= target_speed]
+        if fast:
+            best = max(fast, key=lambda r: r.ratio)
+        else:
+            best = max(results, key=lambda r: r.decode)
+        print(f"Best: {best.label}")
+        if apply:
+            self.m.rechunk(
+                dset, arr.chunks, max_mem, compressor=best.compressor, filters=best.filters
+            )
+        return best, results
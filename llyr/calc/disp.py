@@ -1,9 +1,9 @@
 from typing import Optional
 
 import numpy as np
-import dask.array as da
-from dask.diagnostics import ProgressBar
+from dask.utils import parse_bytes
 
+from .. import _fft
 from ..base import Base
 
 
@@ -18,9 +18,18 @@ class disp(Base):
         yslice=slice(None),
         xslice=slice(None),
         cslice=slice(None),
+        axis: str = "x",
+        max_mem="1GB",
+        fft2d: bool = False,
     ):
+        """Dispersion relation for propagation along `axis` ("x" or "y"). The data is
+        streamed in tiles of rows across the propagation axis holding at most
+        `max_mem`, |fft| is summed over the rows as the tiles are done. With
+        `fft2d=True` the full complex (f, row, k, c) transform is stored too."""
         if name is None:
             name = dset_name
+        if axis not in ("x", "y"):
+            raise ValueError("axis must be 'x' or 'y'")
         if force:
             self.m.rm(f"disp/{name}")
         if any(
@@ -30,90 +39,71 @@ class disp(Base):
                 f"The dataset:'disp/{name}' already exists, you can use 'force=True'"
             )
         dset = self.m[dset_name]
-        if tslice.stop is None or tslice.stop > dset.shape[0]:
-            tslice = slice(dset.shape[0])
+        ts, zs, ys, xs, cs = [
+            range(*s.indices(n))
+            for s, n in zip((tslice, zslice, yslice, xslice, cslice), dset.shape)
+        ]
+        # odd lengths on t and along the propagation
+        if len(ts) % 2 == 0:
+            ts = ts[1:]
+        if axis == "x":
+            rows, ks = ys, xs[1:] if len(xs) % 2 == 0 else xs
+        else:
+            rows, ks = xs, ys[1:] if len(ys) % 2 == 0 else ys
+        nt, nk, nc = len(ts), len(ks), len(cs)
 
-        arr = dset[tslice, zslice, yslice, xslice, cslice]
-        if arr.shape[3] % 2 == 0:
-            arr = arr[:, :, :, 1:, :]
-        if arr.shape[0] % 2 == 0:
-            arr = arr[1:]
-        arr *= np.hanning(arr.shape[0])[:, None, None, None, None]
-        arr -= arr[0]
-        arr = np.sum(arr, axis=1)
-        # hann window on t and x => t,y,x,c
-        hann2d = np.outer(np.hanning(arr.shape[0]), np.hanning(arr.shape[2]))
-        arr *= np.sqrt(hann2d)[:, None, :, None]
-        # 2d fft on t and x => f,y,kx,c
-        arr = np.fft.fft2(arr, axes=[0, 2])
-        self.m.create_dataset(f"disp/{name}/fft2d", data=arr, chunks=None)
-        # substract the avr of t,x for a given y  => f,y,kx,c
-        arr -= np.average(arr, axis=(0, 2))[None, :, None, :]
-        # split f in 2, take 1st half => f,y,kx,c
-        arr = arr[: arr.shape[0] // 2]
-        arr = np.fft.fftshift(arr, axes=(1, 2))
-        arr = np.abs(arr)  # from complex to real
-        arr = np.sum(arr, axis=1)  # sum y => f,kx,c
-        self.m.create_dataset(f"disp/{name}/disp", data=arr, chunks=None)
-
-        ts = dset.attrs["t"][tslice]
-        freqs = np.fft.rfftfreq(len(ts), (ts[-1] - ts[0]) / len(ts))
-        self.m.create_dataset(f"disp/{name}/freqs", data=freqs, chunks=None)
-
-        kvecs = np.fft.fftshift(np.fft.fftfreq(arr.shape[1], self.m.dx)) * 2 * np.pi
-        self.m.create_dataset(f"disp/{name}/kvecs", data=kvecs, chunks=None)
-
-    def calc_da(self, dset_name: str, name: Optional[str] = None):
-        if name is None:
-            name = dset_name
-        if any(
-            f"disp/{name}/{d}" in self.m for d in ["freqs", "kvecs", "disp", "fft2d"]
-        ):
-            raise NameError(
-                f"The dataset:'disp/{name}' already exists, you can use 'force=True'"
-            )
-        dset = self.m[dset_name]
-
-        with ProgressBar():
-            arr = da.from_array(dset, chunks=(None, None, 1, None, None))
-            arr = arr[:]
-            if arr.shape[3] % 2 == 0:
-                arr = arr[:, :, :, 1:, :]
-            if arr.shape[0] % 2 == 0:
-                arr = arr[1:]
-            # arr *= np.hanning(arr.shape[0])[:, None, None, None, None]
-            arr -= arr[0]
-            arr = da.sum(arr, axis=1)
-            # hann window on t and x => t,y,x,c
-            hann2d = np.outer(np.hanning(arr.shape[0]), np.hanning(arr.shape[2]))
-            arr *= np.sqrt(hann2d)[:, None, :, None]
-            # 2d fft on t and x => f,y,kx,c
-            arr = da.fft.fft2(arr, axes=[0, 2])
+        # input, complex fft2 and its abs for one row
+        row_bytes = nt * len(zs) * nk * nc * self.m.float_dtype.itemsize * 5
+        tile = max(1, parse_bytes(max_mem) // row_bytes)
+        chunk = dset.chunks[2 if axis == "x" else 3]
+        if rows.step == 1 and tile > chunk:
+            tile -= tile % chunk
+        window_t = np.hanning(nt).astype(self.m.float_dtype)
+        hann2d = np.sqrt(np.outer(window_t, np.hanning(nk))).astype(self.m.float_dtype)
+        if fft2d:
             d0 = self.m.create_dataset(
                 f"disp/{name}/fft2d",
-                shape=arr.shape,
-                chunks=(1, 128, 128, None),
-                dtype=np.complex128,
+                shape=(nt, len(rows), nk, nc),
+                chunks=(None, min(tile, len(rows)), None, None),
+                dtype=self.m.complex_dtype,
             )
-            da.to_zarr(arr, d0)
-            # substract the avr of t,x for a given y  => f,y,kx,c
-            arr -= da.average(arr, axis=(0, 2))[None, :, None, :]
-            # split f in 2, take 1st half => f,y,kx,c
-            arr = arr[: arr.shape[0] // 2]
-            arr = da.fft.fftshift(arr, axes=(1, 2))
-            arr = da.absolute(arr)  # from complex to real
-            arr = da.sum(arr, axis=1)  # sum y => f,kx,c
-            d1 = self.m.create_dataset(
-                f"disp/{name}/disp",
-                shape=arr.shape,
-                chunks=None,
-                dtype=np.float64,
-            )
-            da.to_zarr(arr, d1)
+        out = np.zeros((nt // 2, nk, nc))
+        for r0 in range(0, len(rows), tile):
+            r = rows[r0 : r0 + tile]
+            r = slice(r.start, r.stop, r.step)
+            k = slice(ks.start, ks.stop, ks.step)
+            sel = (r, k) if axis == "x" else (k, r)
+            arr = dset[
+                (slice(ts.start, ts.stop, ts.step), slice(zs.start, zs.stop, zs.step))
+                + sel
+                + (slice(cs.start, cs.stop, cs.step),)
+            ].astype(self.m.float_dtype)
+            if axis == "y":
+                arr = np.swapaxes(arr, 2, 3)
+            # t,z,row,k,c
+            arr *= window_t[:, None, None, None, None]
+            arr -= arr[0]
+            arr = np.sum(arr, axis=1)
+            # hann window on t and k => t,row,k,c
+            arr *= hann2d[:, None, :, None]
+            # 2d fft on t and k => f,row,k,c
+            arr = _fft.fft2(arr, axes=[0, 2])
+            if fft2d:
+                d0[:, r0 : r0 + arr.shape[1]] = arr
+            # substract the avr of t,k for a given row  => f,row,k,c
+            arr -= np.average(arr, axis=(0, 2))[None, :, None, :]
+            # take the 1st half of f, from complex to real, sum the rows => f,k,c
+            out += np.sum(np.abs(arr[: nt // 2]), axis=1)
+        out = np.fft.fftshift(out, axes=1)
+        self.m.create_dataset(
+            f"disp/{name}/disp", data=out.astype(self.m.float_dtype), chunks=None
+        )
+        self.m[f"disp/{name}"].attrs["axis"] = axis
 
-        ts = dset.attrs["t"][:]
-        freqs = np.fft.rfftfreq(len(ts), (ts[-1] - ts[0]) / len(ts))
+        t = np.array(dset.attrs["t"])[tslice]
+        freqs = np.fft.fftfreq(nt, (t[-1] - t[0]) / len(t))[: nt // 2]
         self.m.create_dataset(f"disp/{name}/freqs", data=freqs, chunks=None)
 
-        kvecs = np.fft.fftshift(np.fft.fftfreq(arr.shape[1], self.m.dx)) * 2 * np.pi
+        d = self.m.dx if axis == "x" else self.m.dy
+        kvecs = np.fft.fftshift(np.fft.fftfreq(nk, d * ks.step)) * 2 * np.pi
         self.m.create_dataset(f"disp/{name}/kvecs", data=kvecs, chunks=None)
@@ -0,0 +1,136 @@
+import time
+from typing import Optional
+
+import numpy as np
+from dask.utils import parse_bytes
+from numcodecs import Blosc
+
+from .. import _fft
+from ..base import Base
+
+
+class disp3d(Base):
+    def calc(
+        self,
+        dset_name: str = "m",
+        name: Optional[str] = None,
+        force: Optional[bool] = False,
+        tslice=slice(None),
+        zslice=slice(None),
+        cslice=slice(None),
+        hanning=True,
+        max_mem="1GB",
+    ):
+        """Full (f, ky, kx, c) dispersion |fft| in `disp3d/{name}/arr`, out of core:
+        the 2d spatial fft of each frame is written to an intermediate (t, ky, kx, c)
+        dataset chunked in k tiles, then each tile is transformed in time. k is
+        fftshifted, only the positive frequencies are kept."""
+        if name is None:
+            name = dset_name
+        if force:
+            self.m.rm(f"disp3d/{name}")
+        if f"disp3d/{name}" in self.m:
+            raise NameError(
+                f"The dataset:'disp3d/{name}' already exists, you can use 'force=True'"
+            )
+        dset = self.m[dset_name]
+        ts = range(*tslice.indices(dset.shape[0]))
+        nt, ny, nx = len(ts), dset.shape[2], dset.shape[3]
+        nc = len(range(*cslice.indices(dset.shape[4])))
+        budget = parse_bytes(max_mem)
+        ctype = self.m.complex_dtype
+        # k tile side such that the time fft of a tile fits in the budget
+        side = 64
+        while side > 1 and 3 * nt * side**2 * nc * ctype.itemsize > budget:
+            side //= 2
+        try:
+            self._transform(dset, name, ts, zslice, cslice, side, hanning, budget)
+        except BaseException:
+            # the incomplete output and the intermediate dataset
+            self.m.rm(f"disp3d/{name}")
+            raise
+        self.m.rm(f"disp3d/{name}/tmp")
+
+        nf = nt // 2
+        t = np.array(dset.attrs["t"])[tslice]
+        freqs = np.fft.fftfreq(nt, (t[-1] - t[0]) / len(t))[:nf]
+        self.m.create_dataset(f"disp3d/{name}/freqs", data=freqs, chunks=None)
+        for k, n, d in [("kx", nx, self.m.dx), ("ky", ny, self.m.dy)]:
+            kvecs = np.fft.fftshift(np.fft.fftfreq(n, d)) * 2 * np.pi
+            self.m.create_dataset(f"disp3d/{name}/{k}", data=kvecs, chunks=None)
+
+    def _transform(self, dset, name, ts, zslice, cslice, side, hanning, budget):
+        nt, ny, nx = len(ts), dset.shape[2], dset.shape[3]
+        nc = len(range(*cslice.indices(dset.shape[4])))
+        ctype = self.m.complex_dtype
+        tmp = self.m.create_dataset(
+            f"disp3d/{name}/tmp",
+            shape=(nt, ny, nx, nc),
+            chunks=(dset.chunks[0], side, side, nc),
+            dtype=ctype,
+            compressor=None,
+        )
+        frame_bytes = np.prod(dset.shape[1:4]) * nc * (dset.dtype.itemsize + 2 * ctype.itemsize)
+        batch = max(1, budget // frame_bytes)
+        if batch > dset.chunks[0]:
+            batch -= batch % dset.chunks[0]
+        start = time.perf_counter()
+        for t0 in range(0, nt, batch):
+            t = ts[t0 : t0 + batch]
+            arr = dset[slice(t.start, t.stop, t.step), zslice, :, :, cslice]
+            arr = np.sum(arr.astype(self.m.float_dtype), axis=1)
+            tmp[t0 : t0 + arr.shape[0]] = _fft.fft2(arr, axes=(1, 2))
+
+        nf = nt // 2
+        # chunked on the k tiles: every tile write replaces whole chunks
+        out = self.m.create_dataset(
+            f"disp3d/{name}/arr",
+            shape=(nf, ny, nx, nc),
+            chunks=(min(nf, 256), side, side, None),
+            dtype=self.m.float_dtype,
+            compressor=Blosc(cname="zstd", clevel=1, shuffle=Blosc.SHUFFLE),
+        )
+        window = np.hanning(nt).astype(self.m.float_dtype)[:, None, None, None]
+        # k index found at each fftshifted position, the tiles are taken in shifted order
+        src_y = np.fft.fftshift(np.arange(ny))
+        src_x = np.fft.fftshift(np.arange(nx))
+        tiles = [(y0, x0) for y0 in range(0, ny, side) for x0 in range(0, nx, side)]
+        for y0, x0 in tiles:
+            arr = tmp.oindex[:, src_y[y0 : y0 + side], src_x[x0 : x0 + side]]
+            arr -= np.average(arr, axis=0)
+            if hanning:
+                arr *= window
+            arr = np.abs(_fft.fft(arr, axis=0)[:nf])
+            out[:, y0 : y0 + side, x0 : x0 + side] = arr.astype(out.dtype)
+        duration = time.perf_counter() - start
+        print(f"disp3d/{name}: {nt} frames, {len(tiles)} k tiles in {duration:.1f} s")
+
+    def kpath(self, name: str = "m", points=((0, 0), (1e8, 0)), npts: int = 100, c=None):
+        """Cut of `disp3d/{name}` along the straight segments joining the (kx, ky)
+        `points` (rad/m), `npts` per segment, snapped to the k grid. Only the chunks
+        crossed by the path are read. Returns the distance along the path, the
+        freqs and the (f, path) or (f, path, c) array."""
+        arr = self.m[f"disp3d/{name}/arr"]
+        kx = self.m[f"disp3d/{name}/kx"][:]
+        ky = self.m[f"disp3d/{name}/ky"][:]
+        points = np.asarray(points, dtype=np.float64)
+        path = np.concatenate(
+            [
+                np.linspace(p0, p1, npts, endpoint=False)
+                for p0, p1 in zip(points[:-1], points[1:])
+            ]
+            + [points[-1:]]
+        )
+        ix = np.abs(kx[None] - path[:, :1]).argmin(axis=1)
+        iy = np.abs(ky[None] - path[:, 1:]).argmin(axis=1)
+        dist = np.concatenate([[0], np.cumsum(np.linalg.norm(np.diff(path, axis=0), axis=1))])
+        cut = np.empty((arr.shape[0], len(path), arr.shape[3]), arr.dtype)
+        cy, cx = arr.chunks[1:3]
+        for by, bx in set(zip(iy // cy, ix // cx)):
+            block = arr[:, by * cy : (by + 1) * cy, bx * cx : (bx + 1) * cx]
+            sel = np.nonzero((iy // cy == by) & (ix // cx == bx))[0]
+            cut[:, sel] = block[:, iy[sel] - by * cy, ix[sel] - bx * cx]
+        freqs = self.m[f"disp3d/{name}/freqs"][:]
+        if c is not None:
+            cut = cut[..., c]
+        return dist, freqs, cut
@@ -1,7 +1,10 @@
 from typing import Optional
 
 import numpy as np
+from dask.utils import parse_bytes
 
+from .. import _fft
+from .._utils import frame_sums
 from ..base import Base
 
 
@@ -18,7 +21,12 @@ class fft(Base):
         cslice=slice(None),
         zero=None,
         hanning=True,
+        max_mem=None,
     ):
+        """Max over space of the rfft of each component. With `max_mem` the data is
+        streamed in tiles of y rows holding at most that much memory, the result
+        doesn't depend on the tiling. When whole frames are selected the average
+        comes from the frame sums, the data is then read only once."""
         if name is None:
             name = dset_name
         if force:
@@ -30,19 +38,70 @@ class fft(Base):
         dset = self.m[dset_name]
         if tslice.stop is None or tslice.stop > dset.shape[0]:
             tslice = slice(dset.shape[0])
-        arr = dset[(tslice, zslice, yslice, xslice, cslice)]
-        if zero is None:
-            arr -= arr[0]
+        zs, ys, xs, cs = [
+            range(*s.indices(n))
+            for s, n in zip((zslice, yslice, xslice, cslice), dset.shape[1:])
+        ]
+        nt = len(range(*tslice.indices(dset.shape[0])))
+        if zero is not None:
+            zero = np.broadcast_to(zero, (len(zs), len(ys), len(xs), len(cs)))
+        if max_mem is None:
+            rows = len(ys)
         else:
-            arr -= zero
-        arr -= np.average(arr)
-        if hanning:
-            arr *= np.hanning(arr.shape[0])[:, None, None, None, None]
-        arr = np.fft.rfft(arr, axis=0)
-        arr = np.abs(arr)
-        arr = np.max(arr, axis=(1, 2, 3))
+            # input, its float copy, then the complex rfft and its abs (half the
+            # length each) for one y row
+            itemsize = dset.dtype.itemsize + self.m.float_dtype.itemsize + self.m.complex_dtype.itemsize
+            row_bytes = nt * len(xs) * len(cs) * itemsize
+            rows = max(1, parse_bytes(max_mem) // row_bytes)
+            if ys.step == 1 and rows > dset.chunks[2]:
+                rows -= rows % dset.chunks[2]
+        tiles = [(zi, yi, min(yi + rows, len(ys))) for zi in range(len(zs)) for yi in range(0, len(ys), rows)]
+
+        def read(zi, y0, y1):
+            yr = ys[y0:y1]
+            arr = dset[
+                (
+                    tslice,
+                    slice(zs[zi], zs[zi] + 1),
+                    slice(yr.start, yr.stop, yr.step),
+                    xslice,
+                    cslice,
+                )
+            ].astype(self.m.float_dtype)
+            if zero is None:
+                arr -= arr[0]
+            else:
+                arr -= zero[zi : zi + 1, y0:y1]
+            return arr
+
+        arr = None
+        if (len(zs), len(ys), len(xs)) == dset.shape[1:4]:
+            # whole frames: the average comes from the frame sums recorded at
+            # ingest, so the data is read only once
+            sums = frame_sums(dset)[tslice][:, cslice]
+            total = sums.sum() - nt * (sums[0].sum() if zero is None else zero.sum(dtype=np.float64))
+            average = total / (nt * len(zs) * len(ys) * len(xs) * len(cs))
+        else:
+            # the average is summed row by row so that it doesn't depend on the tiling
+            row_sums = np.zeros((len(zs), len(ys)))
+            for zi, y0, y1 in tiles:
+                arr = read(zi, y0, y1)
+                for j in range(y1 - y0):
+                    row_sums[zi, y0 + j] = np.sum(np.ascontiguousarray(arr[:, 0, j]), dtype=np.float64)
+            average = row_sums.sum() / (nt * len(zs) * len(ys) * len(xs) * len(cs))
+        out = None
+        for zi, y0, y1 in tiles:
+            if arr is None or len(tiles) > 1:
+                arr = read(zi, y0, y1)
+            arr -= average
+            if hanning:
+                arr *= np.hanning(arr.shape[0]).astype(arr.dtype)[:, None, None, None, None]
+            arr = _fft.rfft(arr, axis=0)
+            arr = np.abs(arr)
+            arr = np.max(arr, axis=(1, 2, 3))
+            out = arr if out is None else np.maximum(out, arr)
         self.m.create_dataset(
-            f"fft/{name}/fft", data=arr, chunks=False, compressor=False
+            f"fft/{name}/fft", data=out, chunks=False, compressor=False
         )
 
         ts = dset.attrs["t"][tslice]
@@ -1,5 +1,6 @@
 import numpy as np
 
+from .. import _fft
 from ..base import Base
 
 
@@ -12,14 +13,14 @@ class fft_tb(Base):
         tstep: int = 1,
         normalize: bool = False,
     ):
-        y = self.m[f"table/{dset}"][slice(tmin, tmax, tstep)]
+        y = self.m[f"table/{dset}"][slice(tmin, tmax, tstep)].astype(self.m.float_dtype)
         ts = self.m["table/t"][:]
         table_dt = (ts[-1] - ts[0]) / len(ts)
         x = np.fft.rfftfreq(y.shape[0], table_dt * tstep) * 1e-9
         y -= y[0]
         y -= np.average(y)
-        y = np.multiply(y, np.hanning(y.shape[0]))
-        y = np.fft.rfft(y)
+        y = np.multiply(y, np.hanning(y.shape[0]).astype(y.dtype))
+        y = _fft.rfft(y)
         y = np.abs(y)
         if normalize:
             y /= y.max()
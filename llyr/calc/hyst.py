@@ -6,7 +6,7 @@ from ..base import Base
 class hyst(Base):
     def calc(self):
         self.m.rm(f"hyst/m")
-        B = self.m.table.B_extz[:]
+        B = self.m.table.B_ext[:, 2]
         m = np.average(
             np.ma.masked_equal(self.m.m[: len(B), :, :, :, 2], 0), axis=(1, 2, 3)
         )
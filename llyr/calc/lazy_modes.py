@@ -0,0 +1,51 @@
+import numpy as np
+from dask.utils import parse_bytes
+
+from ..base import Base
+
+
+class lazy_modes(Base):
+    def calc(self, dset: str = "m", freqs=(), max_mem="1GB"):
+        """Modes of `dset` at the given `freqs` (GHz) only, snapped to the nearest
+        rfft bin so they are the same as the ones of `calc.modes`. All the missing
+        ones are projected in a single pass over the data and cached in
+        `modes/{dset}/lazy/{bin index}`. The cache is dropped when `dset` (or
+        `stable`) changed since: re-ingest, append, rechunk or any rewrite, see
+        `Group.stamp`. Returns the list of (z, y, x, c) arrays."""
+        arr = self.m[dset]
+        ts = arr.attrs["t"][: arr.shape[0]]
+        nt = len(ts)
+        dt = (ts[-1] - ts[0]) / nt
+        bins = np.fft.rfftfreq(nt, dt) * 1e-9
+        source = dict(
+            shape=list(arr.shape), chunks=list(arr.chunks), nt=nt, dt=dt, stamp=self.m.stamp(dset)
+        )
+        if "stable" in self.m:
+            source.update(stable=self.m.stamp("stable"))
+        cache = self.m.require_group(f"modes/{dset}/lazy")
+        if cache.attrs.asdict() != source:
+            self.m.rm(f"modes/{dset}/lazy")
+            self.m.require_group(f"modes/{dset}/lazy").attrs.update(source)
+        idx = [int(np.abs(bins - f).argmin()) for f in np.atleast_1d(freqs)]
+        keys = [f"modes/{dset}/lazy/{i}" for i in idx]
+        todo = sorted({i for i, k in zip(idx, keys) if k not in self.m})
+        if todo:
+            ctype = self.m.complex_dtype
+            stable = self.m.stable[:1] if "stable" in self.m else None
+            k = np.array(todo)
+            out = np.zeros((len(k),) + arr.shape[1:], ctype)
+            frame_bytes = np.prod(arr.shape[1:]) * (arr.dtype.itemsize + ctype.itemsize)
+            batch = max(1, parse_bytes(max_mem) // frame_bytes)
+            if batch > arr.chunks[0]:
+                batch -= batch % arr.chunks[0]
+            for t0 in range(0, nt, batch):
+                x = arr[t0 : t0 + batch].astype(self.m.float_dtype)
+                if stable is not None:
+                    x -= stable
+                t = np.arange(t0, t0 + x.shape[0])
+                # single bin dfts as one matrix product, phases reduced modulo nt
+                w = np.exp(-2j * np.pi * (np.outer(k, t) % nt) / nt).astype(ctype)
+                out += (w @ x.reshape(x.shape[0], -1)).reshape(out.shape)
+            for i, mode in zip(todo, out):
+                self.m.create_dataset(f"modes/{dset}/lazy/{i}", data=mode, chunks=None)
+        return [self.m[k][:] for k in keys]
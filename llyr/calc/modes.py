@@ -1,16 +1,53 @@
 import numpy as np
 import dask.array as da
 
+from .._codecs import ErrorBound
+from .._czt import zoom_fft
+from .._fft import dask_fft, task_backend
+from .._utils import frame_sums
 from ..base import Base
 
 
 class modes(Base):
-    def calc(self, dset: str = "m", name=None, slices=(slice(None),), hanning=True):
+    def average(self, dset: str, slices) -> float:
+        """Average of `dset[slices] - stable[0]`, from the frame sums when the whole
+        frames are selected, else with an extra pass over the data. A python float
+        so that subtracting it keeps the dtype of the data."""
+        arr = self.m[dset]
+        if any(s != slice(None) for s in slices[1:]):
+            x1 = da.from_zarr(arr)[slices]
+            if "stable" in self.m:
+                x1 -= da.from_zarr(self.m.stable)[:1]
+            return float(da.average(x1).compute())
+        sums = frame_sums(arr)[slices[0]]
+        total = sums.sum()
+        if "stable" in self.m:
+            total -= sums.shape[0] * np.sum(self.m.stable[0], dtype=np.float64)
+        return float(total / (sums.shape[0] * np.prod(arr.shape[1:])))
+
+    def calc(
+        self,
+        dset: str = "m",
+        name=None,
+        slices=(slice(None),),
+        hanning=True,
+        error_bound=None,
+        fmin=None,
+        fmax=None,
+        nbins=None,
+        arr=True,
+    ):
+        """rfft of `dset` in `modes/{name}` and the max over space of its windowed
+        spectrum in `fft/{name}`. With `fmin` and/or `fmax` (GHz) only that band is
+        computed and stored, on `nbins` bins (by default the rfft resolution).
+        With `arr=False` only the spectrum is computed, the modes can then be
+        projected at the wanted frequencies with `calc.lazy_modes`."""
         if name is None:
             name = dset
-        self.m.rm(f"modes/{name}")
+        if arr:
+            self.m.rm(f"modes/{name}")
         self.m.rm(f"fft/{name}")
-        x1 = da.from_zarr(self.m[dset])
+        x1 = da.from_zarr(self.m[dset]).astype(self.m.float_dtype)
         if slices[0] == slice(None):
             slices = list(slices)
             slices[0] = slice(None, self.m[dset].shape[0])
@@ -18,31 +55,61 @@ class modes(Base):
         x1 = x1[slices]
         if "stable" in self.m:
             x1 -= da.from_zarr(self.m.stable)[:1]
-        x1 = x1.rechunk((x1.shape[0], 1, 64, 64, x1.shape[-1]))
-        x2 = da.fft.rfft(x1, axis=0)
-        d1 = self.m.create_dataset(
-            f"modes/{name}/arr",
-            shape=x2.shape,
-            chunks=(1, None, None, None, None),
-            dtype=np.complex64,
-        )
-        da.to_zarr(x2, d1)
-        x1 -= da.average(x1)
+        if len(x1.chunks[0]) > 1:
+            # datasets stored time contiguous with `Group.rechunk` skip this step
+            x1 = x1.rechunk((x1.shape[0], 1, 64, 64, x1.shape[-1]))
+        ts = self.m.m.attrs["t"][slices[0]]
+        dt = (ts[-1] - ts[0]) / len(ts)
+        freqs = np.fft.rfftfreq(len(ts), dt) * 1e-9
+        if fmin is None and fmax is None:
+
+            def transform(x):
+                return dask_fft("rfft")(x, axis=0)
+
+        else:
+            fmin = freqs[0] if fmin is None else fmin
+            fmax = freqs[-1] if fmax is None else fmax
+            if nbins is None:
+                nbins = int(round((fmax - fmin) / freqs[1])) + 1
+            freqs = np.linspace(fmin, fmax, nbins)
+
+            def transform(x):
+                return x.map_blocks(
+                    zoom_fft,
+                    freqs * 1e9,
+                    dt,
+                    backend=task_backend(),
+                    chunks=(nbins,) + x.chunks[1:],
+                    dtype=self.m.complex_dtype,
+                )
+
+        x2 = transform(x1)
+        if arr:
+            d1 = self.m.create_dataset(
+                f"modes/{name}/arr",
+                shape=x2.shape,
+                chunks=(1, None, None, None, None),
+                dtype=self.m.complex_dtype,
+                filters=None
+                if error_bound is None
+                else [ErrorBound(error_bound, self.m.complex_dtype.str)],
+            )
+        x1 = x1 - self.average(dset, slices)
         if hanning:
-            x1 = x1 * np.hanning(x1.shape[0])[:, None, None, None, None]
-        x1 = np.fft.rfft(x1, axis=0)
+            x1 = x1 * np.hanning(x1.shape[0]).astype(self.m.float_dtype)[:, None, None, None, None]
+        x1 = transform(x1)
         x1 = da.absolute(x1)
         fft_max = da.max(x1, axis=(1, 2, 3))
-        da.to_zarr(
-            fft_max,
-            self.m.create_dataset(
-                f"fft/{name}/max",
-                shape=fft_max.shape,
-                chunks=None,
-                dtype=np.float32,
-            ),
+        d2 = self.m.create_dataset(
+            f"fft/{name}/max",
+            shape=fft_max.shape,
+            chunks=None,
+            dtype=self.m.float_dtype,
         )
-        ts = self.m.m.attrs["t"][slices[0]]
-        freqs = np.fft.rfftfreq(len(ts), (ts[-1] - ts[0]) / len(ts)) * 1e-9
+        if arr:
+            # both products are computed from each tile in a single read of the data
+            da.store([x2, fft_max], [d1, d2])
+            self.m.create_dataset(f"modes/{name}/freqs", data=freqs, chunks=False)
+        else:
+            da.store(fft_max, d2)
         self.m.create_dataset(f"fft/{name}/freqs", data=freqs, chunks=False)
-        self.m.create_dataset(f"modes/{name}/freqs", data=freqs, chunks=False)
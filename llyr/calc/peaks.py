@@ -1,26 +1,82 @@
 from collections import namedtuple
 
-import peakutils
+import numpy as np
 
 from ..base import Base
 
+PEAK_DTYPE = np.dtype([("row", "i8"), ("idx", "i8"), ("freq", "f8"), ("amp", "f8")])
+
+
+def find_peaks(y, x=None, thres=0.01, min_dist=2, refine="quadratic"):
+    """Peaks of every row of `y` (freq on the last axis) in one vectorized pass.
+    Local maxima above `thres` (relative to the range of the row), and of the
+    peaks closer than `min_dist` bins only the highest is kept. This is the
+    selection of `peakutils.indexes` for float spectra, it differs on plateaus
+    (equal neighbouring values, common in integer data): a flat top gives its
+    first bin here and its middle one there, and of two equal peaks closer than
+    `min_dist` the lowest index is kept here. The frequency and amplitude of each peak are refined
+    between bins with a parabola through the 3 points around it ("quadratic"),
+    through their inverse ("lorentzian") or not at all (None). Returns a
+    structured array with fields row, idx, freq and amp, sorted by row and idx."""
+    y = np.atleast_2d(np.asarray(y, dtype=np.float64))
+    n, m = y.shape
+    if x is None:
+        x = np.arange(m, dtype=np.float64)
+    ymin, ymax = y.min(axis=1, keepdims=True), y.max(axis=1, keepdims=True)
+    cand = np.zeros_like(y, dtype=bool)
+    cand[:, 1:-1] = (
+        (y[:, 1:-1] > y[:, :-2]) & (y[:, 1:-1] >= y[:, 2:]) & (y[:, 1:-1] > thres * (ymax - ymin) + ymin)
+    )
+    row, idx = np.nonzero(cand)
+    if min_dist > 1 and len(idx):
+        # pairs (i, j) of peaks closer than min_dist where j is higher than i,
+        # ties go to the lowest index
+        pairs = []
+        for o in range(1, min_dist + 1):
+            i, j = np.arange(o, len(idx)), np.arange(len(idx) - o)
+            close = (row[i] == row[j]) & (idx[i] - idx[j] <= min_dist)
+            yi, yj = y[row[i], idx[i]], y[row[j], idx[j]]
+            pairs += [(i[close & (yj >= yi)], j[close & (yj >= yi)])]
+            pairs += [(j[close & (yi > yj)], i[close & (yi > yj)])]
+        low = np.concatenate([p[0] for p in pairs])
+        high = np.concatenate([p[1] for p in pairs])
+        keep = np.ones(len(idx), bool)
+        while True:
+            # a peak is kept if no kept peak within min_dist is higher, iterated
+            # to the fixed point which is what the greedy peakutils loop gives
+            new = np.bincount(low, weights=keep[high], minlength=len(idx)) == 0
+            if np.array_equal(new, keep):
+                break
+            keep = new
+        row, idx = row[keep], idx[keep]
+    peaks = np.empty(len(idx), PEAK_DTYPE)
+    peaks["row"], peaks["idx"] = row, idx
+    if refine not in ("quadratic", "lorentzian", None):
+        raise ValueError("refine must be 'quadratic', 'lorentzian' or None")
+    a, b, c = y[row, idx - 1], y[row, idx], y[row, idx + 1]
+    # a lorentzian is a parabola in 1/y, only possible for positive values
+    inv = (refine == "lorentzian") & (a > 0) & (b > 0) & (c > 0)
+    a, b, c = [np.where(inv, 1 / np.where(inv, v, 1), v) for v in (a, b, c)]
+    denom = a - 2 * b + c
+    delta = np.where(denom != 0, 0.5 * (a - c) / np.where(denom != 0, denom, 1), 0)
+    if refine is None:
+        delta[:] = 0
+    amp = b - 0.25 * (a - c) * delta
+    amp = np.where(inv, 1 / amp, amp)
+    peaks["freq"] = x[idx] + delta * (x[idx + 1] - x[idx - 1]) / 2
+    peaks["amp"] = amp
+    return peaks
+
 
 class peaks(Base):
-    def calc(self, x, y, thres=0.01, min_dist=2):
+    def calc(self, x, y, thres=0.01, min_dist=2, refine="quadratic"):
         Peak = namedtuple("Peak", "idx freq amp")
-        idx = peakutils.indexes(y, thres=thres, min_dist=min_dist)
-        peak_amp = [y[i] for i in idx]
-        freqs = [float(f"{x[i]:.2f}") for i in idx]
-        return [Peak(i, f, a) for i, f, a in zip(idx, freqs, peak_amp)]
+        p = find_peaks(y, x, thres, min_dist, refine)
+        return [Peak(int(i), float(f), float(a)) for i, f, a in p[["idx", "freq", "amp"]]]
 
-    def npeaks(self, x, y, peaknb, min_dist=2, sort="amp", reverse=False):
-        Peak = namedtuple("Peak", "idx freq amp")
-        thres = 0
-        idx = peakutils.indexes(y, thres=0.01, min_dist=min_dist)
-        idx = sorted(idx, key=lambda x: y[x], reverse=True)[:peaknb]
-        peak_amp = [y[i] for i in idx]
-        freqs = [float(f"{x[i]:.2f}") for i in idx]
-        peaks = [Peak(i, f, a) for i, f, a in zip(idx, freqs, peak_amp)]
+    def npeaks(self, x, y, peaknb, min_dist=2, sort="amp", reverse=False, refine="quadratic"):
+        peaks = self.calc(x, y, 0.01, min_dist, refine)
+        peaks = sorted(peaks, key=lambda p: p.amp, reverse=True)[:peaknb]
         return sorted(
             peaks,
             key=lambda x: x[{"idx": 0, "freq": 1, "amp": 2}[sort]],
@@ -0,0 +1,90 @@
+import numpy as np
+
+from .. import _fft
+from ..base import Base
+
+
+class spectrogram(Base):
+    def calc(
+        self,
+        dset: str = "m",
+        name=None,
+        nperseg: int = 256,
+        noverlap=None,
+        slices=(slice(None),),
+        force=False,
+    ):
+        """Short time spectra of `dset`: overlapping segments of `nperseg` frames
+        are detrended, hann windowed and transformed as soon as their frames are
+        read, the power density is summed over space. Writes `spec` (segment, f, c),
+        the segment center `times`, `freqs` in GHz and the `welch` average of the
+        segments to `spectrogram/{name}`"""
+        if name is None:
+            name = dset
+        if force:
+            self.m.rm(f"spectrogram/{name}")
+        if f"spectrogram/{name}" in self.m:
+            raise NameError(
+                f"The dataset:'spectrogram/{name}' already exists, you can use 'force=True'"
+            )
+        if noverlap is None:
+            noverlap = nperseg // 2
+        step = nperseg - noverlap
+        if step < 1:
+            raise ValueError("noverlap must be smaller than nperseg")
+        arr = self.m[dset]
+        slices = tuple(slices) + (slice(None),) * (5 - len(slices))
+        ts = np.array(self.m[dset].attrs["t"])[slices[0]]
+        frames = range(*slices[0].indices(arr.shape[0]))
+        nseg = (len(frames) - noverlap) // step
+        if nseg < 1:
+            raise ValueError(f"Only {len(frames)} frames, less than nperseg={nperseg}")
+        dt = (ts[-1] - ts[0]) / (len(ts) - 1)
+        window = np.hanning(nperseg + 1)[:-1].astype(self.m.float_dtype)[:, None, None, None, None]
+        # one sided power spectral density, as in scipy.signal.welch
+        scale = np.full(nperseg // 2 + 1, 2 * dt / np.sum(window**2))
+        scale[0] /= 2
+        if nperseg % 2 == 0:
+            scale[-1] /= 2
+        freqs = np.fft.rfftfreq(nperseg, dt)
+        spec = self.m.create_dataset(
+            f"spectrogram/{name}/spec",
+            shape=(nseg, freqs.size, len(range(*slices[4].indices(arr.shape[-1])))),
+            chunks=(64, None, None),
+            dtype=self.m.float_dtype,
+        )
+        welch = np.zeros(spec.shape[1:])
+        buffer = None
+        filled = 0
+        seg = 0
+        tchunk = max(1, arr.chunks[0] // frames.step)
+        for i in range(0, len(frames), tchunk):
+            sub = frames[i : i + tchunk]
+            block = arr[(slice(sub.start, sub.stop, sub.step),) + slices[1:]]
+            if buffer is None:
+                buffer = np.empty((nperseg,) + block.shape[1:], self.m.float_dtype)
+            j = 0
+            while j < block.shape[0] and seg < nseg:
+                n = min(nperseg - filled, block.shape[0] - j)
+                buffer[filled : filled + n] = block[j : j + n]
+                filled += n
+                j += n
+                if filled == nperseg:
+                    x = buffer - buffer.mean(axis=0, dtype=np.float64).astype(buffer.dtype)
+                    x *= window
+                    p = np.abs(_fft.rfft(x, axis=0)) ** 2
+                    p = p.sum(axis=(1, 2, 3)) * scale[:, None]
+                    spec[seg] = p
+                    welch += p
+                    seg += 1
+                    buffer[:noverlap] = buffer[step:]
+                    filled = noverlap
+            if seg == nseg:
+                break
+        self.m.create_dataset(
+            f"spectrogram/{name}/times",
+            data=ts[nperseg // 2 + step * np.arange(nseg)],
+            chunks=False,
+        )
+        self.m.create_dataset(f"spectrogram/{name}/freqs", data=freqs * 1e-9, chunks=False)
+        self.m.create_dataset(f"spectrogram/{name}/welch", data=welch / nseg, chunks=False)
@@ -1,18 +1,16 @@
-from glob import glob
 import matplotlib.pyplot as plt
 import matplotlib as mpl
 import numpy as np
-import peakutils
 
 from ._utils import make_cmap
+from .calc.peaks import find_peaks
+from ._sweep import sweep_to_zarr
 
 
 def ipp(op, path, xstep=2, comp=0, fmin=0, fmax=20, title="nm", anim=False):
-    paths = sorted(
-        glob(f"{path}/*.zarr"),
-        key=lambda x: float(x.split("/")[-1].replace(".zarr", "")),
-    )
-    xlabels = np.array([float(p.split("/")[-1].replace(".zarr", "")) for p in paths])
+    sweep = sweep_to_zarr(path)
+    paths = [f"{path}/{n}" for n in sweep.attrs["names"]]
+    xlabels = sweep["params"][:]
     lstep = xlabels[1] - xlabels[0]
     fig = plt.figure(figsize=(8, 4), dpi=200)
     gs = fig.add_gridspec(1, 2)
@@ -22,13 +20,8 @@ def ipp(op, path, xstep=2, comp=0, fmin=0, fmax=20, title="nm", anim=False):
     )
     gs.update(left=0.08, right=0.99, top=0.88, bottom=0.03, wspace=0.1, hspace=0.1)
     cm1 = make_cmap((40, 42, 54, 0), (139, 233, 253, 255), 256)
-    arr = []
-    for p in paths:
-        m = op(p)
-        arr.append(m.fft.m.max[2:, comp])
-    arr = np.array(arr).T
-    ts = m.m.attrs["t"]
-    freqs = np.fft.rfftfreq(m.m.shape[0], (ts[-1] - ts[0]) / len(ts))[2:] * 1e-9
+    arr = sweep["spec"][:, 2:, comp].T
+    freqs = sweep["freqs"][2:]
     ax_plot.imshow(
         arr,
         aspect="auto",
@@ -99,7 +92,7 @@ def ipp(op, path, xstep=2, comp=0, fmin=0, fmax=20, title="nm", anim=False):
         if snap:
             fft = m.fft.m.max[2:, 0]
             freqs = m.fft.m.freqs[2:]  # * 1e-9
-            peaks = freqs[peakutils.indexes(fft, thres=s.thres, min_dist=2)]
+            peaks = find_peaks(fft, freqs, s.thres, 2)["freq"]
             s.peaks = peaks
             s.peak_index = np.abs(peaks - y).argmin()
             y = peaks[s.peak_index]
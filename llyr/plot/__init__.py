@@ -1,36 +1,52 @@
-from .anim import anim
-from .anim2 import anim2
-from .ovf_anim import ovf_anim
-from .fft_tb import fft_tb
-from .imshow import imshow
-from .modes import modes
-from .snapshot import snapshot
-from .hyst import hyst
-from .snapshot_png import snapshot_png
-from .report import report
-from .sin_anim import sin_anim
-from .cross_section import cross_section
-from .spec import spec
-from .disp import disp
-from .idisp import idisp
+import sys
+from importlib import import_module
+
+from .._lazy import LazyPackage
+
+# attribute: (module, class, method), the modules are imported on first use
+_methods = {
+    "anim": ("anim", "anim", "plot"),
+    "anim2": ("anim2", "anim2", "plot"),
+    "ovf_anim": ("ovf_anim", "ovf_anim", "plot"),
+    "fft_tb": ("fft_tb", "fft_tb", "plot"),
+    "imshow": ("imshow", "imshow", "plot"),
+    "modes": ("modes", "modes", "plot"),
+    "mode": ("modes", "modes", "plot_one"),
+    "mode_v2": ("modes", "modes", "plot_one_v2"),
+    "snapshot": ("snapshot", "snapshot", "plot"),
+    "hyst": ("hyst", "hyst", "plot"),
+    "snapshot_png": ("snapshot_png", "snapshot_png", "plot"),
+    "report": ("report", "report", "plot"),
+    "sin_anim": ("sin_anim", "sin_anim", "plot"),
+    "cross_section": ("cross_section", "cross_section", "plot"),
+    "spec": ("spec", "spec", "plot"),
+    "disp": ("disp", "disp", "plot"),
+    "idisp": ("idisp", "idisp", "plot"),
+}
+
+
+def __getattr__(name):
+    for module, cls, _ in _methods.values():
+        if cls == name:
+            return getattr(import_module(f".{module}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+sys.modules[__name__].__class__ = LazyPackage
 
 
 class Plot:
     def __init__(self, llyr):
-        self.anim = anim(llyr).plot
-        self.anim2 = anim2(llyr).plot
-        self.ovf_anim = ovf_anim(llyr).plot
-        self.fft_tb = fft_tb(llyr).plot
-        self.imshow = imshow(llyr).plot
-        self.modes = modes(llyr).plot
-        self.mode = modes(llyr).plot_one
-        self.mode_v2 = modes(llyr).plot_one_v2
-        self.snapshot = snapshot(llyr).plot
-        self.hyst = hyst(llyr).plot
-        self.snapshot_png = snapshot_png(llyr).plot
-        self.report = report(llyr).plot
-        self.sin_anim = sin_anim(llyr).plot
-        self.cross_section = cross_section(llyr).plot
-        self.spec = spec(llyr).plot
-        self.disp = disp(llyr).plot
-        self.idisp = idisp(llyr).plot
+        self._llyr = llyr
+
+    def __getattr__(self, name):
+        if name not in _methods:
+            raise AttributeError(f"'Plot' object has no attribute {name!r}")
+        module, cls, method = _methods[name]
+        obj = getattr(import_module(f".{module}", __package__), cls)
+        value = getattr(obj(self._llyr), method)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(_methods)
@@ -12,6 +12,8 @@ class disp(Base):
         arr = self.m[f"disp/{dset}/disp"][slices]
         freqs = self.m[f"disp/{dset}/freqs"][slices[0]]
         kvecs = self.m[f"disp/{dset}/kvecs"][slices[1]]
+        axis = self.m[f"disp/{dset}"].attrs.get("axis", "x")
+        d = self.m.dx if axis == "x" else self.m.dy
         im = ax.imshow(
             arr,
             aspect="auto",
@@ -25,10 +27,10 @@ class disp(Base):
                 freqs.max() * 1e-9,
             ],
         )
-        ax.set_xlabel(r"$k_x$ (1/nm)")
+        ax.set_xlabel(rf"$k_{axis}$ (1/nm)")
         ax.set_ylabel("f (GHz)")
         ax.set_title(self.m.sim_name)
-        ax.set_xlim(-1 / self.m.dx * 1e-9 / 4, 1 / self.m.dx * 1e-9 / 4)
+        ax.set_xlim(-1 / d * 1e-9 / 4, 1 / d * 1e-9 / 4)
         ax.set_ylim(4, 18)
         fig.colorbar(im, ax=ax)
         fig.tight_layout()
@@ -1,15 +1,22 @@
 import matplotlib.pyplot as plt
 import numpy as np
 
+from .. import _fft
 from ..base import Base
 
 
 class idisp(Base):
     def plot(self, dset="m", slices=(slice(None), slice(None), 0)):
+        if f"disp/{dset}/fft2d" not in self.m:
+            raise NameError(
+                f"'disp/{dset}/fft2d' is missing, use calc.disp with 'fft2d=True'"
+            )
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(13, 6))
         arr = self.m[f"disp/{dset}/disp"][slices]
         freqs = self.m[f"disp/{dset}/freqs"][slices[0]]
         kvecs = self.m[f"disp/{dset}/kvecs"][slices[1]]
+        axis = self.m[f"disp/{dset}"].attrs.get("axis", "x")
+        d = self.m.dx if axis == "x" else self.m.dy
         im = ax1.imshow(
             arr,
             aspect="auto",
@@ -23,10 +30,10 @@ class idisp(Base):
                 freqs.max() * 1e-9,
             ],
         )
-        ax1.set_xlabel(r"$k_x$ (1/nm)")
+        ax1.set_xlabel(rf"$k_{axis}$ (1/nm)")
         ax1.set_ylabel("f (GHz)")
         ax1.set_title(self.m.sim_name)
-        ax1.set_xlim(-1 / self.m.dx * 1e-9 / 5, 1 / self.m.dx * 1e-9 / 5)
+        ax1.set_xlim(-1 / d * 1e-9 / 5, 1 / d * 1e-9 / 5)
         ax1.set_ylim(4, 18)
         fig.colorbar(im, ax=ax1)
         hline = ax1.axhline(5, ls="--", lw=0.8, c="#ffb86c")
@@ -39,7 +46,7 @@ class idisp(Base):
             kmin = kvecs.shape[0] // 2 - 200
             kmax = kvecs.shape[0] // 2 + 200
             arr = self.m[f"disp/{dset}/fft2d"][:, :, :, 0]
-            arr2 = np.fft.ifft2(arr)[1000 + f_idx, kmin:kmax]
+            arr2 = _fft.ifft2(arr)[1000 + f_idx, kmin:kmax]
             ax2.cla()
             im = ax2.imshow(np.abs(arr2), aspect="auto", origin="lower", zorder=-1)
             cax = ax2.inset_axes(
@@ -1,7 +1,8 @@
+from dask.utils import parse_bytes
 
 from ..base import Base
 
-from .._utils import save_ovf
+from .._ovf import export_ovf
 
 
 class ovf_anim(Base):
@@ -10,19 +11,23 @@ class ovf_anim(Base):
         savepath: str = None,
         dset: str = "m",
         slices = (slice(None),slice(None),slice(None,None,5),slice(None,None,5),slice(None)),
+        binary: int = 4,
+        max_mem="1GB",
+        threads: int = 8,
     ):
         if savepath is None:
             savepath = f"anim/{dset}"
         self.m.rm(savepath)
         self.m.mkdir(savepath)
-        arr = self.m[dset][slices]
-        print(f"Shape : {arr.shape}")
-        for i,a in enumerate(arr):
-            save_ovf(
-                f"{self.m.abs_path}/{savepath}/{i}.ovf",
-                a,
-                self.m.dx,
-                self.m.dy,
-                self.m.dz,
-            )
-        print(f"Saved in: {savepath}")
+        n = export_ovf(
+            self.m[dset],
+            f"{self.m.abs_path}/{savepath}",
+            slices,
+            self.m.dx,
+            self.m.dy,
+            self.m.dz,
+            binary,
+            parse_bytes(max_mem),
+            threads,
+        )
+        print(f"Saved {n} frames in: {savepath}")
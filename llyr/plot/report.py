@@ -1,10 +1,10 @@
 from collections import namedtuple
 
 import matplotlib.pyplot as plt
-import peakutils
 import numpy as np
 
 from ..base import Base
+from ..calc.peaks import find_peaks
 
 
 class report(Base):
@@ -31,25 +31,30 @@ class report(Base):
                 # y = np.multiply(y, np.hanning(y.shape[0]))
                 # y = np.fft.rfft(y)
                 # y = np.abs(y)
-                spectra["freqs"] = self.m.fft.m.freqs[:]
-                spectra[c] = self.m.fft.m.max[:, c]
+                spectra["freqs"] = self.m[f"fft/{dset}/freqs"][:]
+                spectra[c] = self.m[f"fft/{dset}/max"][:, c]
             return spectra
 
         def get_peaks(s):
             Peak = namedtuple("Peak", "idx freq amp")
-            all_peaks = {}
-            for c in range(3):
-                idx = peakutils.indexes(s[c], thres=thres, min_dist=min_dist)
-                peak_amp = [s[c][i] for i in idx]
-                freqs = [s["freqs"][i] for i in idx]
-                all_peaks[c] = [Peak(i, f, a) for i, f, a in zip(idx, freqs, peak_amp)]
+            # the 3 components in one pass
+            found = find_peaks(
+                np.stack([s[c] for c in range(3)]), s["freqs"], thres, min_dist
+            )
+            all_peaks = {
+                c: [
+                    Peak(int(p["idx"]), float(p["freq"]), float(p["amp"]))
+                    for p in found[found["row"] == c]
+                ]
+                for c in range(3)
+            }
             no_dup_peaks = []
-            all_freqs = []
+            all_idx = []
             for peak_list in all_peaks.values():
                 for peak in peak_list:
-                    if peak.freq not in all_freqs:  # removes duplicate freqs
+                    if peak.idx not in all_idx:  # removes duplicate freqs
                         no_dup_peaks.append(peak)
-                        all_freqs.append(peak.freq)
+                        all_idx.append(peak.idx)
             sorted_peaks = sorted(no_dup_peaks, key=lambda x: x[2], reverse=True)[
                 :nb_modes
             ]
@@ -60,6 +65,9 @@ class report(Base):
             modes = []
             Mode = namedtuple("Mode", "idx freq amp mx my mz")
             ModeComp = namedtuple("ModeArr", "abs ang alpha")
+            # all the peaks in one pass, get_mode then reads them from the cache
+            if f"modes/{dset}/arr" not in self.m:
+                self.m.calc.lazy_modes(dset, [peak.freq for peak in peaks])
             for peak in peaks:
                 modes_comps = []
                 arrs = self.m.get_mode(dset, peak.freq)[z, :, :]
@@ -154,6 +162,8 @@ class report(Base):
                 for ax in axes.flatten():
                     ax.set(xticks=[], yticks=[])
 
+        if f"fft/{dset}/max" not in self.m:
+            self.m.calc.modes(dset, arr=False)
         spectra = get_spectra()
         sorted_peaks, all_peaks = get_peaks(spectra)
         modes = get_modes(sorted_peaks)
@@ -2,10 +2,10 @@ from collections import namedtuple
 
 import matplotlib.pyplot as plt
 import matplotlib as mpl
-import peakutils
 import numpy as np
 
 from ..base import Base
+from ..calc.peaks import find_peaks
 
 
 class spec(Base):
@@ -20,10 +20,8 @@ class spec(Base):
     ):
         def get_peaks(x, y):
             Peak = namedtuple("Peak", "idx freq amp")
-            idx = peakutils.indexes(y, thres=thres, min_dist=min_dist)
-            peak_amp = [y[i] for i in idx]
-            freqs = [x[i] for i in idx]
-            return [Peak(i, f, a) for i, f, a in zip(idx, freqs, peak_amp)]
+            found = find_peaks(y, x, thres, min_dist)
+            return [Peak(int(i), f, a) for i, f, a in found[["idx", "freq", "amp"]]]
 
         def plot_spectra(ax, x, y, peaks):
             ax.plot(x, y)
@@ -45,7 +43,7 @@ class spec(Base):
             for ax in axes.flatten():
                 ax.cla()
                 ax.set(xticks=[], yticks=[])
-            mode = self.m.get_mode("m", f)[0]
+            mode = self.m.get_mode(dset, f)[0]
             extent = [
                 0,
                 mode.shape[1] * self.m.dx * 1e9,
@@ -86,8 +84,10 @@ class spec(Base):
                 )
 
         def get_spectrum():
-            x = self.m.fft.m.freqs[:]
-            y = self.m.fft.m.max[:, c]
+            if f"fft/{dset}/max" not in self.m:
+                self.m.calc.modes(dset, arr=False)
+            x = self.m[f"fft/{dset}/freqs"][:]
+            y = self.m[f"fft/{dset}/max"][:, c]
             x1 = np.abs(x - xmin).argmin()
             x2 = np.abs(x - xmax).argmin()
             return x[x1:x2], y[x1:x2]
@@ -0,0 +1,74 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+import zarr
+
+import llyr
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+
+
+class CountingStore(zarr.storage.DirectoryStore):
+    """Records the keys read"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.reads = []
+
+    def __getitem__(self, key):
+        self.reads.append(key)
+        return super().__getitem__(key)
+
+
+@pytest.fixture
+def out_dir(tmp_path):
+    """Copy of tests/test_sim.out, the ovf index is written next to it"""
+    return shutil.copytree(f"{TESTS}/test_sim.out", tmp_path / "test_sim.out")
+
+
+def reference_load_ovf(path: str) -> np.ndarray:
+    """The ovf reader llyr had before OvfFile (Binary 4 only)"""
+    with open(path, "rb") as f:
+        dims = np.array([0, 0, 0, 0])
+        while True:
+            line = f.readline().strip().decode("ASCII")
+            if "valuedim" in line:
+                dims[3] = int(line.split(" ")[-1])
+            if "xnodes" in line:
+                dims[2] = int(line.split(" ")[-1])
+            if "ynodes" in line:
+                dims[1] = int(line.split(" ")[-1])
+            if "znodes" in line:
+                dims[0] = int(line.split(" ")[-1])
+            if "Begin: Data" in line:
+                break
+        count = int(dims[0] * dims[1] * dims[2] * dims[3] + 1)
+        return np.fromfile(f, "<f4", count=count)[1:].reshape(dims)
+
+
+@pytest.fixture
+def sim(out_dir, tmp_path):
+    """tests/test_sim.out ingested and opened"""
+    llyr.out_to_zarr(str(out_dir), str(tmp_path / "sim.zarr"), processes=1)
+    return llyr.op(str(tmp_path / "sim.zarr"))
+
+
+@pytest.fixture
+def synthetic(tmp_path):
+    """Waves along x and y plus noise, (32, 1, 12, 10, 3) on (5, 1, 4, 4, 3) chunks"""
+    rng = np.random.default_rng(0)
+    nt, ny, nx = 32, 12, 10
+    t = np.arange(nt) * 1e-11
+    tt, yy, xx = np.meshgrid(t, np.arange(ny), np.arange(nx), indexing="ij")
+    arr = np.empty((nt, 1, ny, nx, 3), np.float32)
+    arr[:, 0, ..., 0] = 0.1 * np.cos(2 * np.pi * (12e9 * tt - xx / 5))
+    arr[:, 0, ..., 1] = 0.05 * np.sin(2 * np.pi * (20e9 * tt - yy / 4))
+    arr[:, 0, ..., 2] = 0.9
+    arr += rng.normal(0, 0.01, arr.shape).astype(np.float32)
+    g = zarr.open_group(str(tmp_path / "synthetic.zarr"), "w")
+    g.create_dataset("m", data=arr, chunks=(5, 1, 4, 4, 3)).attrs["t"] = t.tolist()
+    g.create_dataset("stable", data=arr[:1] * 0.5, chunks=None)
+    g.attrs.update(dx=1e-9, dy=2e-9, dz=1e-9)
+    return llyr.op(str(tmp_path / "synthetic.zarr"))
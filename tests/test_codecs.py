@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+import zarr
+from numcodecs import Blosc
+
+from llyr._codecs import ErrorBound, TimeDelta
+
+
+@pytest.mark.parametrize("error_bound, itemsize", [(1e-2, 1), (1e-4, 2), (1e-6, 4)])
+def test_error_bound_picks_the_smallest_int(error_bound, itemsize):
+    arr = np.random.default_rng(0).uniform(-1, 1, (5, 1, 16, 16, 3)).astype("f4")
+    codec = ErrorBound(error_bound)
+    enc = codec.encode(arr)
+    assert enc[0] == itemsize and enc.nbytes == (1 + arr.size) * itemsize
+    dec = codec.decode(enc).reshape(arr.shape)
+    # plus the rounding of the decoded value to float32
+    assert np.abs(dec - arr).max() <= error_bound + np.spacing(np.float32(1))
+
+
+def test_error_bound_complex_in_zarr(tmp_path):
+    rng = np.random.default_rng(1)
+    arr = (rng.normal(size=(4, 8, 8)) + 1j * rng.normal(size=(4, 8, 8))).astype("c8")
+    z = zarr.open_array(
+        str(tmp_path / "a.zarr"), "w", shape=arr.shape, chunks=(1, 8, 8), dtype="c8",
+        filters=[ErrorBound(1e-3, "<c8")], compressor=Blosc(cname="zstd"),
+    )
+    z[:] = arr
+    dec = zarr.open_array(str(tmp_path / "a.zarr"), "r")[:]
+    assert np.abs(dec.real - arr.real).max() <= 1e-3 + np.spacing(np.float32(4))
+    assert np.abs(dec.imag - arr.imag).max() <= 1e-3 + np.spacing(np.float32(4))
+
+
+def test_error_bound_fixed_astype_still_decodes():
+    # the config written before the int type was picked per chunk
+    codec = ErrorBound(1e-4, "<f4", "<i4")
+    arr = np.linspace(-1, 1, 100, dtype="f4")
+    assert codec.encode(arr).dtype == np.dtype("<i4")
+    np.testing.assert_allclose(codec.decode(codec.encode(arr)), arr, atol=1e-4)
+    with pytest.raises(ValueError):
+        ErrorBound(1e-12, "<f4", "<i2").encode(arr)
+
+
+def test_time_delta_is_lossless():
+    arr = np.random.default_rng(2).normal(size=(6, 10)).astype("f4")
+    codec = TimeDelta(10)
+    np.testing.assert_array_equal(codec.decode(codec.encode(arr)).reshape(arr.shape), arr)
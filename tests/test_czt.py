@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from llyr._czt import zoom_fft
+from test_modes import reference_modes
+
+
+@pytest.mark.parametrize("dtype, tol", [(np.float64, 1e-10), (np.float32, 1e-5)])
+@pytest.mark.parametrize("n", [64, 101])
+def test_zoom_fft_matches_rfft(dtype, tol, n):
+    x = np.random.default_rng(n).normal(size=(n, 3, 4)).astype(dtype)
+    dt = 1e-11
+    bins = np.fft.rfftfreq(n, dt)
+    ref = np.fft.rfft(x.astype(np.float64), axis=0)
+    for sel in (slice(None), slice(5, 20), slice(7, 8), slice(3, 30, 3)):
+        out = zoom_fft(x, bins[sel], dt)
+        assert out.dtype == np.result_type(dtype, np.complex64)
+        np.testing.assert_allclose(out, ref[sel], rtol=0, atol=tol * np.abs(ref).max())
+
+
+def test_zoom_fft_axis():
+    x = np.random.default_rng(0).normal(size=(4, 50))
+    bins = np.fft.rfftfreq(50, 1.0)[2:10]
+    np.testing.assert_allclose(zoom_fft(x, bins, 1.0, axis=1), np.fft.rfft(x, axis=1)[:, 2:10], atol=1e-10)
+
+
+def test_band_modes_match_the_rfft_bins(synthetic):
+    arr, _, freqs = reference_modes(synthetic)
+    synthetic.calc.modes("m", fmin=freqs[3], fmax=freqs[9])
+    np.testing.assert_allclose(synthetic.modes.m.freqs[:], freqs[3:10])
+    np.testing.assert_allclose(
+        synthetic.modes.m.arr[:], arr[3:10], rtol=0, atol=1e-5 * np.abs(arr).max()
+    )
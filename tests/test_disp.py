@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+
+def reference_disp(arr):
+    """calc.disp before the streaming engine, (t, z, y, x, c) with x the propagation axis"""
+    if arr.shape[3] % 2 == 0:
+        arr = arr[:, :, :, 1:, :]
+    if arr.shape[0] % 2 == 0:
+        arr = arr[1:]
+    arr = arr * np.hanning(arr.shape[0])[:, None, None, None, None]
+    arr -= arr[0]
+    arr = np.sum(arr, axis=1)
+    hann2d = np.outer(np.hanning(arr.shape[0]), np.hanning(arr.shape[2]))
+    arr *= np.sqrt(hann2d)[:, None, :, None]
+    fft2d = np.fft.fft2(arr, axes=[0, 2])
+    arr = fft2d - np.average(fft2d, axis=(0, 2))[None, :, None, :]
+    arr = arr[: arr.shape[0] // 2]
+    arr = np.fft.fftshift(arr, axes=(1, 2))
+    return np.sum(np.abs(arr), axis=1), fft2d
+
+
+@pytest.mark.parametrize("max_mem", ["1GB", 20000, 1])
+@pytest.mark.parametrize("axis", ["x", "y"])
+def test_disp_tiles_match_the_reference(synthetic, max_mem, axis):
+    arr = synthetic.m[:]
+    if axis == "y":
+        arr = np.swapaxes(arr, 2, 3)
+    ref, ref_fft2d = reference_disp(arr)
+    synthetic.calc.disp("m", axis=axis, max_mem=max_mem, fft2d=True)
+    out = synthetic.disp.m.disp[:]
+    assert out.shape == ref.shape
+    np.testing.assert_allclose(out, ref, rtol=0, atol=1e-5 * ref.max())
+    fft2d = synthetic.disp.m.fft2d[:]
+    np.testing.assert_allclose(fft2d, ref_fft2d, rtol=0, atol=1e-5 * np.abs(ref_fft2d).max())
+    assert synthetic.disp.m.freqs.shape == (ref.shape[0],)
+    d = synthetic.dx if axis == "x" else synthetic.dy
+    kvecs = np.fft.fftshift(np.fft.fftfreq(ref.shape[1], d)) * 2 * np.pi
+    np.testing.assert_allclose(synthetic.disp.m.kvecs[:], kvecs)
+
+
+def test_disp_slices(synthetic):
+    sel = (slice(2, 30), slice(None), slice(1, 11), slice(0, 9), slice(0, 2))
+    ref, _ = reference_disp(synthetic.m[sel])
+    synthetic.calc.disp("m", tslice=sel[0], yslice=sel[2], xslice=sel[3], cslice=sel[4], max_mem=20000)
+    np.testing.assert_allclose(synthetic.disp.m.disp[:], ref, rtol=0, atol=1e-5 * ref.max())
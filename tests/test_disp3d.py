@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from llyr import _fft
+
+
+def reference_disp3d(arr):
+    """(t, z, y, x, c) to the (f, ky, kx, c) |fft| with k fftshifted, all in memory"""
+    arr = np.fft.fft2(np.sum(arr, axis=1), axes=(1, 2))
+    arr = arr - np.average(arr, axis=0)
+    arr *= np.hanning(arr.shape[0])[:, None, None, None]
+    arr = np.abs(np.fft.fft(arr, axis=0)[: arr.shape[0] // 2])
+    return np.fft.fftshift(arr, axes=(1, 2))
+
+
+@pytest.mark.parametrize("max_mem, side", [("1GB", 64), (40000, 4), (10000, 2), (2000, 1)])
+def test_disp3d_matches_the_reference(synthetic, max_mem, side):
+    ref = reference_disp3d(synthetic.m[:])
+    synthetic.calc.disp3d("m", max_mem=max_mem)
+    arr = synthetic["disp3d/m/arr"]
+    assert arr.shape == ref.shape
+    np.testing.assert_allclose(arr[:], ref, rtol=0, atol=1e-5 * ref.max())
+    assert "disp3d/m/tmp" not in synthetic
+    # the k tiles are written on whole chunks
+    assert arr.chunks == (16, side, side, 3)
+
+
+def test_disp3d_cleans_up_after_a_failure(synthetic, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("interrupted")
+
+    monkeypatch.setattr(_fft, "fft", fail)
+    with pytest.raises(RuntimeError):
+        synthetic.calc.disp3d("m", max_mem=10000)
+    assert "disp3d/m" not in synthetic
+    monkeypatch.undo()
+    synthetic.calc.disp3d("m", max_mem=10000)
+    assert "disp3d/m/arr" in synthetic
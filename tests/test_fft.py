@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+import llyr
+from llyr._store import ConsolidatedStore
+from conftest import CountingStore
+
+
+def reference_fft(dset, tslice=slice(None), zslice=slice(None), yslice=slice(None), xslice=slice(None), cslice=slice(None)):
+    """calc.fft before the tiling"""
+    arr = dset[(tslice, zslice, yslice, xslice, cslice)]
+    arr -= arr[0]
+    arr -= np.average(arr)
+    arr *= np.hanning(arr.shape[0])[:, None, None, None, None]
+    arr = np.fft.rfft(arr, axis=0)
+    return np.max(np.abs(arr), axis=(1, 2, 3))
+
+
+@pytest.mark.parametrize("max_mem", [None, 70000, 1])
+@pytest.mark.parametrize("yslice", [slice(None), slice(1, 11, 2)])
+def test_fft_tiles_match_the_reference(synthetic, max_mem, yslice):
+    m = synthetic
+    ref = reference_fft(m.m, yslice=yslice)
+    m.calc.fft("m", yslice=yslice, max_mem=max_mem)
+    out = m.fft.m.fft[:]
+    assert out.dtype == np.float32
+    np.testing.assert_allclose(out, ref, rtol=0, atol=1e-5 * ref.max())
+    ts = np.array(m.m.attrs["t"])
+    np.testing.assert_allclose(m.fft.m.freqs[:], np.fft.rfftfreq(len(ts), (ts[-1] - ts[0]) / len(ts)))
+
+
+def test_fft_on_the_test_sim(sim):
+    ref = reference_fft(sim.m)
+    sim.calc.fft("m", max_mem=1)
+    np.testing.assert_allclose(sim.fft.m.fft[:], ref, rtol=0, atol=1e-5 * ref.max())
+
+
+def test_tiled_fft_reads_the_data_once(synthetic):
+    # the frame sums are recorded at ingest
+    llyr._utils.frame_sums(synthetic.m)
+    store = CountingStore(str(synthetic.abs_path))
+    m = llyr.Group(ConsolidatedStore(store))
+    # 70kB holds one row of chunks
+    m.calc.fft("m", max_mem=70000)
+    chunks = [k for k in store.reads if k.startswith("m/") and not k.startswith("m/.")]
+    assert sorted(chunks) == sorted(set(chunks))
+    assert len(chunks) == m.m.nchunks
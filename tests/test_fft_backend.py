@@ -0,0 +1,65 @@
+import threading
+
+import dask
+import numpy as np
+import pytest
+
+from llyr import _fft
+from llyr._czt import zoom_fft
+
+
+@pytest.mark.parametrize("func", ["fft", "rfft", "ifft"])
+def test_backends_agree(func):
+    x = np.random.default_rng(0).normal(size=(64, 5)).astype(np.float32)
+    ref = getattr(np.fft, func)(x.astype(np.float64), axis=0)
+    for name in ("numpy", "scipy"):
+        with _fft.fft_backend(name):
+            out = getattr(_fft, func)(x, axis=0)
+        assert out.dtype == np.complex64
+        np.testing.assert_allclose(out, ref, rtol=0, atol=1e-5 * np.abs(ref).max())
+
+
+def test_fft_backend_is_local_to_the_thread(monkeypatch):
+    monkeypatch.setattr(_fft, "_state", {"name": "scipy", "workers": 3})
+    seen = {}
+    with _fft.fft_backend("numpy", 2):
+        thread = threading.Thread(target=lambda: seen.update(other=_fft.get_fft_backend()))
+        thread.start()
+        thread.join()
+        assert _fft.get_fft_backend() == ("numpy", 2)
+    assert seen["other"] == ("scipy", 3)
+    assert _fft.get_fft_backend() == ("scipy", 3)
+
+
+def test_dask_tasks_share_the_workers():
+    with _fft.fft_backend("scipy", 8), dask.config.set(num_workers=4):
+        assert _fft.task_backend() == ("scipy", 2)
+    with _fft.fft_backend("scipy", 2), dask.config.set(num_workers=4):
+        assert _fft.task_backend() == ("scipy", 1)
+
+
+def test_dask_fft_uses_the_backend_of_the_graph(monkeypatch):
+    import dask.array as da
+
+    calls = []
+    real = _fft._call
+
+    def spy(func, x, *args, backend=None, **kwargs):
+        calls.append(backend)
+        return real(func, x, *args, backend=backend, **kwargs)
+
+    monkeypatch.setattr(_fft, "_call", spy)
+    x = np.random.default_rng(1).normal(size=(32, 8))
+    with _fft.fft_backend("numpy", 8), dask.config.set(scheduler="threads", num_workers=4):
+        y = _fft.dask_fft("rfft")(da.from_array(x, chunks=(32, 2)), axis=0)
+    # computed outside of the block, in the scheduler threads
+    np.testing.assert_allclose(y.compute(), np.fft.rfft(x, axis=0))
+    assert calls and all(c == ("numpy", 2) for c in calls)
+
+
+def test_zoom_fft_backend():
+    x = np.random.default_rng(2).normal(size=(40, 3))
+    bins = np.fft.rfftfreq(40, 1.0)[2:9]
+    np.testing.assert_allclose(
+        zoom_fft(x, bins, 1.0, backend=("numpy", 1)), zoom_fft(x, bins, 1.0, backend=("scipy", 1))
+    )
@@ -0,0 +1,38 @@
+import numpy as np
+import zarr
+
+import llyr
+
+
+def test_get_mode_follows_writes_through_other_handles(synthetic):
+    synthetic.calc.modes("m")
+    fi = int(np.abs(synthetic.modes.m.freqs[:] - 12).argmin())
+    mode = synthetic.modes.m.arr[fi]
+    np.testing.assert_array_equal(synthetic.get_mode("m", 12), mode)
+    hits = synthetic.cache.hits
+    synthetic.get_mode("m", 12)
+    assert synthetic.cache.hits == hits + 2
+    # written without going through the Group methods
+    other = zarr.open_group(str(synthetic.abs_path))
+    other["modes/m/arr"][fi] = mode * 3
+    np.testing.assert_array_equal(synthetic.get_mode("m", 12), mode * 3)
+
+
+def test_get_mode_after_reload(synthetic):
+    synthetic.calc.modes("m")
+    old = synthetic.get_mode("m", 12)
+    # the modes recomputed by another process
+    other = llyr.op(str(synthetic.abs_path))
+    other.m[:] = other.m[:] * 2
+    other.calc.modes("m")
+    other.store.close()
+    synthetic.reload()
+    assert len(synthetic.cache) == 0
+    new = synthetic.get_mode("m", 12)
+    np.testing.assert_allclose(new, 2 * old, rtol=1e-5, atol=1e-5 * np.abs(old).max())
+
+
+def test_get_mode_lazy_follows_the_data(synthetic):
+    old = synthetic.get_mode("m", 12)
+    synthetic.m[:] = synthetic.m[:] * 2
+    np.testing.assert_allclose(synthetic.get_mode("m", 12), 2 * old, rtol=1e-5, atol=1e-5 * np.abs(old).max())
@@ -0,0 +1,43 @@
+import shutil
+
+import h5py
+import numpy as np
+import pytest
+import zarr
+
+import llyr
+from llyr._utils import merge_table
+from conftest import TESTS
+
+
+def reference_h5_to_zarr(p):
+    """What h5_to_zarr did before the parallel copy"""
+    source = h5py.File(p, "r")
+    dest = zarr.open(p.replace(".h5", ".zarr"), mode="a")
+    zarr.copy_all(source, dest)
+    merge_table(dest)
+    source.close()
+    return dest
+
+
+def arrays(group):
+    out = {}
+    group.visititems(lambda name, obj: out.update({name: obj}) if isinstance(obj, zarr.Array) else None)
+    return out
+
+
+@pytest.mark.parametrize("max_mem", ["1GB", 20000])
+def test_h5_to_zarr_matches_copy_all(tmp_path, max_mem):
+    ref = reference_h5_to_zarr(str(shutil.copy(f"{TESTS}/test_sim.h5", tmp_path / "ref.h5")))
+    p = str(shutil.copy(f"{TESTS}/test_sim.h5", tmp_path / "new.h5"))
+    # 20kB forces the batched copy of m, on other chunks than the h5 ones
+    llyr.h5_to_zarr(p, chunks={"m": (2, 1, 10, 10, 3)}, max_mem=max_mem, processes=2)
+    new = zarr.open(p.replace(".h5", ".zarr"), "r")
+    assert new["m"].chunks == (2, 1, 10, 10, 3)
+    assert new.attrs.asdict() == ref.attrs.asdict()
+    ref_arrays, new_arrays = arrays(ref), arrays(new)
+    assert sorted(new_arrays) == sorted(ref_arrays)
+    for name, arr in ref_arrays.items():
+        assert new_arrays[name].dtype == arr.dtype
+        np.testing.assert_array_equal(new_arrays[name][...], arr[...])
+        assert new_arrays[name].attrs.asdict() == arr.attrs.asdict()
@@ -0,0 +1,50 @@
+import subprocess
+import sys
+
+import pytest
+
+# cumulative `import llyr` time, ~1 ms on a warm cache
+CEILING_US = 50_000
+
+
+def run(code, *flags):
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code], capture_output=True, text=True, check=True
+    )
+
+
+def test_import_time():
+    # the first run warms the bytecode cache
+    run("import llyr")
+    err = run("import llyr", "-X", "importtime").stderr
+    cumulative = [int(line.split("|")[1]) for line in err.splitlines() if line.split("|")[-1].strip() == "llyr"]
+    assert len(cumulative) == 1
+    assert cumulative[0] < CEILING_US
+
+
+@pytest.mark.parametrize(
+    "code, loaded",
+    [
+        ("import llyr", []),
+        ("import llyr; llyr.op", []),
+        ("import llyr.calc, llyr.plot; llyr.calc.Calc, llyr.plot.Plot", []),
+    ],
+)
+def test_heavy_modules_are_not_imported(code, loaded):
+    heavy = ("matplotlib", "dask.array", "h5py")
+    out = run(f"{code}; import sys; print([m for m in {heavy!r} if m in sys.modules])").stdout
+    assert out.strip() == str(loaded)
+
+
+def test_calc_and_plot_attributes_are_the_classes():
+    import llyr.calc
+    import llyr.calc.modes
+    import llyr.plot
+
+    assert isinstance(llyr.calc.modes, type) and llyr.calc.modes.__name__ == "modes"
+    assert llyr.calc.modes.__module__ == "llyr.calc.modes"
+    assert llyr.calc.find_peaks.__module__ == "llyr.calc.peaks"
+    from llyr.plot import modes
+
+    assert modes.__module__ == "llyr.plot.modes"
+    assert llyr.plot.modes is modes
@@ -0,0 +1,123 @@
+import os
+import shutil
+import threading
+import time
+from glob import glob
+
+import numpy as np
+import pytest
+import zarr
+
+import llyr
+from llyr._ovf import index_path, ovf_index
+from conftest import TESTS, reference_load_ovf
+
+
+def reference_frames(out_dir, dset):
+    return np.stack([reference_load_ovf(p) for p in sorted(glob(f"{out_dir}/{dset}0*.ovf"))])
+
+
+def test_out_to_zarr_matches_reference(out_dir, tmp_path):
+    n = llyr.out_to_zarr(str(out_dir), str(tmp_path / "sim.zarr"), processes=2)
+    m = zarr.open(str(tmp_path / "sim.zarr"), "r")
+    ref = reference_frames(out_dir, "m")
+    assert n == len(ref) + 1
+    np.testing.assert_array_equal(m.m[:], ref)
+    np.testing.assert_array_equal(m.stable[0], reference_load_ovf(f"{out_dir}/stable.ovf"))
+    assert m.m.attrs["ovfs"] == [os.path.basename(p) for p in sorted(glob(f"{out_dir}/m0*.ovf"))]
+    assert len(m.m.attrs["t"]) == len(ref)
+    np.testing.assert_allclose(m.m.attrs["sums"], ref.sum(axis=(1, 2, 3), dtype=np.float64))
+
+
+def test_small_max_mem_gives_the_same_frames(out_dir, tmp_path):
+    # one chunk in flight at a time
+    llyr.out_to_zarr(str(out_dir), str(tmp_path / "sim.zarr"), processes=2, max_mem=1)
+    m = zarr.open(str(tmp_path / "sim.zarr"), "r")
+    np.testing.assert_array_equal(m.m[:], reference_frames(out_dir, "m"))
+
+
+def test_append_matches_a_full_ingest(out_dir, tmp_path):
+    partial = tmp_path / "partial.out"
+    os.makedirs(partial)
+    ovfs = sorted(glob(f"{out_dir}/m0*.ovf"))
+    for p in ovfs[:4]:
+        shutil.copy(p, partial)
+    zpath = str(tmp_path / "sim.zarr")
+    assert llyr.out_to_zarr(str(partial), zpath, processes=2, append=True) == 4
+    # nothing new
+    assert llyr.out_to_zarr(str(partial), zpath, processes=2, append=True) == 0
+    for p in ovfs[4:]:
+        shutil.copy(p, partial)
+    assert llyr.out_to_zarr(str(partial), zpath, processes=2, append=True) == len(ovfs) - 4
+    m = zarr.open(zpath, "r")
+    np.testing.assert_array_equal(m.m[:], reference_frames(out_dir, "m"))
+    assert len(m.m.attrs["t"]) == len(m.m.attrs["ovfs"]) == len(ovfs)
+    np.testing.assert_allclose(m.m.attrs["sums"], m.m[:].sum(axis=(1, 2, 3), dtype=np.float64))
+
+
+def test_ovf_index_is_saved_and_reused(out_dir):
+    index = ovf_index(str(out_dir))
+    assert os.path.exists(index_path(str(out_dir)))
+    assert ovf_index(str(out_dir)) == index
+    assert ovf_index(str(out_dir), save=False)["dsets"] == index["dsets"]
+    d = index["dsets"]["m"]
+    assert d["files"] == [os.path.basename(p) for p in sorted(glob(f"{out_dir}/m0*.ovf"))]
+    assert all(d["complete"])
+
+
+def test_watch_out_counts_table_rows_as_progress(tmp_path):
+    out = tmp_path / "table_only.out"
+    os.makedirs(out)
+    with open(f"{TESTS}/test_sim.out/table.txt") as f:
+        lines = f.readlines()
+    with open(out / "table.txt", "w") as f:
+        f.writelines(lines[:2])
+
+    def writer():
+        # a sim only writing table rows, each one after more than `timeout`/2
+        for line in lines[2:]:
+            time.sleep(0.15)
+            with open(out / "table.txt", "a") as f:
+                f.write(line)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    zpath = str(tmp_path / "sim.zarr")
+    llyr.watch_out(str(out), zpath, interval=0.05, timeout=0.3, processes=1)
+    thread.join()
+    assert zarr.open(zpath, "r").table.t.shape == (len(lines) - 1,)
+
+
+def test_interrupted_append_is_redone(out_dir, tmp_path, monkeypatch):
+    partial = tmp_path / "partial.out"
+    os.makedirs(partial)
+    ovfs = sorted(glob(f"{out_dir}/m0*.ovf"))
+    for p in ovfs[:3]:
+        shutil.copy(p, partial)
+    zpath = str(tmp_path / "sim.zarr")
+    llyr.out_to_zarr(str(partial), zpath, processes=1, append=True)
+    for p in ovfs[3:]:
+        shutil.copy(p, partial)
+
+    def interrupted(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(llyr._utils, "ingest_ovfs", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        llyr.out_to_zarr(str(partial), zpath, processes=1, append=True)
+    monkeypatch.undo()
+    assert llyr.out_to_zarr(str(partial), zpath, processes=1, append=True) == len(ovfs) - 3
+    m = zarr.open(zpath, "r")
+    np.testing.assert_array_equal(m.m[:], reference_frames(out_dir, "m"))
+    assert len(m.m.attrs["t"]) == len(m.m.attrs["ovfs"]) == len(ovfs)
+
+
+def test_append_needs_the_ovfs_attribute(out_dir, tmp_path):
+    zpath = str(tmp_path / "sim.zarr")
+    llyr.out_to_zarr(str(out_dir), zpath, processes=1)
+    # as ingested before the ovfs attribute was recorded
+    m = zarr.open(zpath)
+    del m.m.attrs["ovfs"]
+    with pytest.raises(ValueError, match="ovfs"):
+        llyr.out_to_zarr(str(out_dir), zpath, processes=1, append=True)
+    assert zarr.open(zpath, "r").m.shape[0] == len(glob(f"{out_dir}/m0*.ovf"))
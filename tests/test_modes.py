@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+import llyr
+from llyr._store import ConsolidatedStore
+from conftest import CountingStore
+
+
+def reference_modes(m, dset="m"):
+    """calc.modes before the single pass, in numpy"""
+    x1 = m[dset][:]
+    if "stable" in m:
+        x1 = x1 - m.stable[:1]
+    arr = np.fft.rfft(x1, axis=0)
+    x1 = x1 - np.average(x1)
+    x1 = x1 * np.hanning(x1.shape[0])[:, None, None, None, None]
+    fft_max = np.max(np.abs(np.fft.rfft(x1, axis=0)), axis=(1, 2, 3))
+    ts = m[dset].attrs["t"]
+    freqs = np.fft.rfftfreq(len(ts), (ts[-1] - ts[0]) / len(ts)) * 1e-9
+    return arr, fft_max, freqs
+
+
+@pytest.mark.parametrize("fixture", ["sim", "synthetic"])
+def test_modes_match_the_reference(request, fixture):
+    m = request.getfixturevalue(fixture)
+    arr, fft_max, freqs = reference_modes(m)
+    m.calc.modes("m")
+    assert m.modes.m.arr.dtype == np.complex64
+    np.testing.assert_allclose(m.modes.m.arr[:], arr, rtol=0, atol=1e-5 * np.abs(arr).max())
+    np.testing.assert_allclose(m.fft.m.max[:], fft_max, rtol=0, atol=1e-5 * fft_max.max())
+    np.testing.assert_allclose(m.fft.m.freqs[:], freqs)
+    np.testing.assert_allclose(m.modes.m.freqs[:], freqs)
+
+
+def test_spectrum_only(synthetic):
+    _, fft_max, _ = reference_modes(synthetic)
+    synthetic.calc.modes("m", arr=False)
+    assert "modes/m/arr" not in synthetic
+    np.testing.assert_allclose(synthetic.fft.m.max[:], fft_max, rtol=0, atol=1e-5 * fft_max.max())
+
+
+def test_modes_read_the_data_once(synthetic):
+    llyr._utils.frame_sums(synthetic.m)
+    store = CountingStore(str(synthetic.abs_path))
+    m = llyr.Group(ConsolidatedStore(store))
+    m.calc.modes("m")
+    chunks = [k for k in store.reads if k.startswith("m/") and not k.startswith("m/.")]
+    assert sorted(chunks) == sorted(set(chunks))
+    assert len(chunks) == m.m.nchunks
+
+
+def test_lazy_modes_follow_the_source(synthetic):
+    arr, _, freqs = reference_modes(synthetic)
+    modes = synthetic.calc.lazy_modes("m", freqs[[3, 7]])
+    for i, mode in zip([3, 7], modes):
+        np.testing.assert_allclose(mode, arr[i], rtol=0, atol=1e-5 * np.abs(arr).max())
+    assert sorted(synthetic["modes/m/lazy"]) == ["3", "7"]
+    # appended frames change the bins, the cached modes are dropped
+    m = synthetic.m
+    t = m.attrs["t"]
+    m.append(m[-8:])
+    m.attrs["t"] = t + [t[-1] + (i + 1) * (t[1] - t[0]) for i in range(8)]
+    arr, _, freqs = reference_modes(synthetic)
+    mode = synthetic.calc.lazy_modes("m", freqs[3])[0]
+    np.testing.assert_allclose(mode, arr[3], rtol=0, atol=1e-5 * np.abs(arr).max())
+    assert list(synthetic["modes/m/lazy"]) == ["3"]
+    # rewritten in place with the same shape
+    synthetic.m[:] = synthetic.m[:] * 2
+    arr, _, _ = reference_modes(synthetic)
+    mode = synthetic.calc.lazy_modes("m", freqs[3])[0]
+    np.testing.assert_allclose(mode, arr[3], rtol=0, atol=1e-5 * np.abs(arr).max())
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from llyr._ovf import CONTROL_NUMBERS, OvfFile, ovf_header, write_ovf
+
+SHAPE = (2, 3, 4, 3)
+
+
+@pytest.fixture
+def frame():
+    return np.random.default_rng(0).normal(size=SHAPE).astype(np.float32)
+
+
+@pytest.mark.parametrize("binary", [4, 8])
+def test_binary(tmp_path, frame, binary):
+    path = str(tmp_path / "m000001.ovf")
+    write_ovf(path, frame, ovf_header(SHAPE, 1e-9, 2e-9, 3e-9, binary), t=2.5e-10, binary=binary)
+    ovf = OvfFile(path)
+    assert ovf.format == f"Binary {binary}"
+    assert ovf.version == "2.0"
+    assert ovf.dtype == np.dtype(f"<f{binary}")
+    assert ovf.shape == SHAPE
+    assert (ovf.dx, ovf.dy, ovf.dz) == (1e-9, 2e-9, 3e-9)
+    assert ovf.t == 2.5e-10
+    np.testing.assert_array_equal(ovf.data, frame)
+
+
+def test_text(tmp_path, frame):
+    path = tmp_path / "m000001.ovf"
+    header = ovf_header(SHAPE).replace("Binary 4", "Text").format(title="m", t=1e-9)
+    values = "\n".join(" ".join(repr(float(v)) for v in row) for row in frame.reshape(-1, 3))
+    path.write_text(f"{header}{values}\n# End: Data Text\n# End: Segment\n")
+    ovf = OvfFile(str(path))
+    assert ovf.format == "Text"
+    assert ovf.dtype == np.float64
+    assert ovf.t == 1e-9
+    np.testing.assert_array_equal(ovf.data, frame)
+
+
+def ovf1(path, frame, control):
+    """OVF 1.0 file, big endian Binary 8 and without valuedim"""
+    nz, ny, nx, _ = frame.shape
+    header = [
+        "# OOMMF: rectangular mesh v1.0",
+        "# Segment count: 1",
+        "# Begin: Segment",
+        "# Begin: Header",
+        "# Title: m",
+        "# Desc: Total simulation time:  3e-10  s",
+        "# Desc: second desc line",
+        "# meshtype: rectangular",
+        "# meshunit: m",
+        f"# xnodes: {nx}",
+        f"# ynodes: {ny}",
+        f"# znodes: {nz}",
+        "# xstepsize: 1e-09",
+        "# ystepsize: 1e-09",
+        "# zstepsize: 1e-09",
+        "# End: Header",
+        "# Begin: Data Binary 8",
+    ]
+    with open(path, "wb") as f:
+        f.write(("\n".join(header) + "\n").encode("ASCII"))
+        f.write(np.array(control, ">f8").tobytes())
+        f.write(frame.astype(">f8").tobytes())
+        f.write(b"# End: Data Binary 8\n# End: Segment\n")
+
+
+def test_ovf1_big_endian(tmp_path, frame):
+    path = str(tmp_path / "m000001.ovf")
+    ovf1(path, frame, CONTROL_NUMBERS[8])
+    ovf = OvfFile(path)
+    assert ovf.version == "1.0"
+    assert ovf.dtype == np.dtype(">f8")
+    assert ovf.comp == 3
+    assert ovf.t == 3e-10
+    np.testing.assert_array_equal(ovf.data, frame)
+
+
+def test_bad_control_number(tmp_path, frame):
+    path = str(tmp_path / "m000001.ovf")
+    ovf1(path, frame, 1.0)
+    with pytest.raises(ValueError, match="control number"):
+        OvfFile(path)
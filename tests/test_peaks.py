@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from llyr.calc.peaks import find_peaks
+
+peakutils = pytest.importorskip("peakutils")
+
+
+def spectra(n=20, m=300, seed=0):
+    """Rows of lorentzians on noise, as float spectra"""
+    rng = np.random.default_rng(seed)
+    x = np.arange(m)
+    y = rng.random((n, m)) * 0.05
+    for row in y:
+        for x0 in rng.uniform(0, m, 8):
+            row += rng.uniform(0.1, 1) / (1 + ((x - x0) / rng.uniform(1, 5)) ** 2)
+    return y
+
+
+@pytest.mark.parametrize("min_dist", [1, 2, 5, 20])
+@pytest.mark.parametrize("thres", [0.01, 0.3])
+def test_find_peaks_matches_peakutils(min_dist, thres):
+    y = spectra()
+    peaks = find_peaks(y, thres=thres, min_dist=min_dist, refine=None)
+    for i, row in enumerate(y):
+        ref = peakutils.indexes(row, thres=thres, min_dist=min_dist)
+        np.testing.assert_array_equal(peaks["idx"][peaks["row"] == i], ref)
+
+
+def test_find_peaks_plateaus():
+    # peakutils gives the middle of a flat top, find_peaks its first bin
+    y = np.array([0, 1, 3, 3, 3, 1, 0, 2, 0], dtype=np.float64)
+    assert list(find_peaks(y, min_dist=1)["idx"]) == [2, 7]
+    assert list(peakutils.indexes(y, thres=0.01, min_dist=1)) == [3, 7]
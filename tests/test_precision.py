@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from llyr import _fft
+
+# documented on Group.precision: single precision results are within ~1e-5 of
+# the double precision ones, relative to their maximum
+TOL = 1e-5
+
+
+@pytest.fixture
+def fft_dtypes(monkeypatch):
+    """dtypes of the arrays given to the fft backend"""
+    dtypes = []
+    real = _fft._call
+
+    def spy(func, x, *args, **kwargs):
+        dtypes.append(np.asarray(x).dtype)
+        return real(func, x, *args, **kwargs)
+
+    monkeypatch.setattr(_fft, "_call", spy)
+    return dtypes
+
+
+def both(m, run):
+    out = {}
+    for precision in ("single", "double"):
+        m.precision = precision
+        out[precision] = run(precision)
+    m.precision = "single"
+    return out["single"], out["double"]
+
+
+def close(single, double):
+    single, double = np.asarray(single), np.asarray(double)
+    np.testing.assert_allclose(single, double, rtol=0, atol=TOL * np.abs(double).max())
+
+
+def test_fft_precision(synthetic, fft_dtypes):
+    def run(p):
+        synthetic.calc.fft("m", name=p, max_mem=70000)
+        return synthetic[f"fft/{p}/fft"][:]
+
+    single, double = both(synthetic, run)
+    assert single.dtype == np.float32
+    assert set(fft_dtypes) == {np.dtype(np.float32), np.dtype(np.float64)}
+    close(single, double)
+
+
+def test_modes_precision(synthetic, fft_dtypes):
+    def run(p):
+        fft_dtypes.clear()
+        synthetic.calc.modes("m", name=p)
+        # no upcast on the way to the fft
+        assert set(fft_dtypes) == {synthetic.float_dtype}
+        return synthetic[f"modes/{p}/arr"][:], synthetic[f"fft/{p}/max"][:]
+
+    (arr_s, max_s), (arr_d, max_d) = both(synthetic, run)
+    assert arr_s.dtype == np.complex64 and arr_d.dtype == np.complex128
+    assert max_s.dtype == np.float32 and max_d.dtype == np.float64
+    close(arr_s, arr_d)
+    close(max_s, max_d)
+
+
+def test_band_modes_precision(synthetic, fft_dtypes):
+    def run(p):
+        fft_dtypes.clear()
+        synthetic.calc.modes("m", name=p, fmin=20, fmax=40)
+        assert set(fft_dtypes) == {synthetic.complex_dtype}
+        return synthetic[f"modes/{p}/arr"][:]
+
+    close(*both(synthetic, run))
+
+
+@pytest.mark.parametrize("axis", ["x", "y"])
+def test_disp_precision(synthetic, fft_dtypes, axis):
+    def run(p):
+        fft_dtypes.clear()
+        synthetic.calc.disp("m", name=p, axis=axis, max_mem=20000)
+        assert set(fft_dtypes) == {synthetic.float_dtype}
+        return synthetic[f"disp/{p}/disp"][:]
+
+    single, double = both(synthetic, run)
+    assert single.dtype == np.float32 and double.dtype == np.float64
+    close(single, double)
+
+
+def test_bad_modes_stay_in_single_precision(synthetic, fft_dtypes):
+    synthetic.calc.bad_modes("m")
+    assert set(fft_dtypes) == {np.dtype(np.float32)}
+    assert synthetic.fft.m.bad.dtype == np.float32
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+signal = pytest.importorskip("scipy.signal")
+
+
+def reference_spectrogram(x, dt, nperseg, noverlap):
+    """scipy's spectrogram and welch of the (t, z, y, x, c) frames, summed over space"""
+    x = np.moveaxis(x, 0, -1).reshape(-1, x.shape[-1], x.shape[0]).astype(np.float64)
+    kw = dict(fs=1 / dt, window="hann", nperseg=nperseg, noverlap=noverlap, detrend="constant")
+    freqs, times, spec = signal.spectrogram(x, scaling="density", mode="psd", **kw)
+    _, welch = signal.welch(x, average="mean", **kw)
+    # (space, c, f, segment) to (segment, f, c)
+    return freqs, times, spec.sum(axis=0).transpose(2, 1, 0), welch.sum(axis=0).T
+
+
+@pytest.mark.parametrize(
+    "nperseg, noverlap, tslice",
+    [(8, None, slice(None)), (8, 2, slice(None)), (10, 3, slice(1, None)), (8, 6, slice(None, None, 2))],
+)
+def test_spectrogram_matches_scipy(synthetic, nperseg, noverlap, tslice):
+    t = np.array(synthetic.m.attrs["t"])[tslice]
+    dt = (t[-1] - t[0]) / (len(t) - 1)
+    ref_freqs, ref_times, ref_spec, ref_welch = reference_spectrogram(
+        synthetic.m[tslice], dt, nperseg, nperseg // 2 if noverlap is None else noverlap
+    )
+    synthetic.calc.spectrogram("m", nperseg=nperseg, noverlap=noverlap, slices=(tslice,))
+    out = synthetic.spectrogram.m
+    assert out.spec.shape == ref_spec.shape
+    np.testing.assert_allclose(out.spec[:], ref_spec, rtol=0, atol=1e-5 * ref_spec.max())
+    np.testing.assert_allclose(out.welch[:], ref_welch, rtol=0, atol=1e-5 * ref_welch.max())
+    np.testing.assert_allclose(out.freqs[:], ref_freqs * 1e-9)
+    np.testing.assert_allclose(out.times[:], t[0] + ref_times, rtol=1e-12)
@@ -0,0 +1,129 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+import zarr
+
+import llyr
+from llyr._store import ChunkCache, ConsolidatedStore
+
+
+class MetadataWrites(zarr.storage.DirectoryStore):
+    """Counts the writes of .zmetadata"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.writes = 0
+
+    def __setitem__(self, key, value):
+        if key == ".zmetadata":
+            self.writes += 1
+        super().__setitem__(key, value)
+
+
+def test_metadata_is_written_once(synthetic):
+    base = MetadataWrites(str(synthetic.abs_path))
+    store = ConsolidatedStore(base)
+    with llyr.Group(store) as m:
+        for i in range(20):
+            m.create_dataset(f"many/d{i}", shape=(4,), chunks=None).attrs["i"] = i
+        m.rm("many/d0")
+        assert base.writes == 0
+        assert ".zmetadata" not in base
+    assert base.writes == 1
+    m = llyr.op(str(synthetic.abs_path))
+    assert sorted(m.many) == sorted(f"d{i}" for i in range(1, 20))
+    assert m.many.d3.attrs["i"] == 3
+
+
+def test_unflushed_metadata(synthetic):
+    # another store on the same folder flushes the open ones first
+    synthetic.create_dataset("new", shape=(4,), chunks=None)
+    assert "new" in llyr.op(str(synthetic.abs_path))
+    # a process that died before writing .zmetadata leaves the folder to be rescanned
+    synthetic.create_dataset("newer", shape=(4,), chunks=None)
+    assert ".zmetadata" not in synthetic.store.base
+    synthetic.store.flush()
+    assert ".zmetadata" in synthetic.store.base
+
+
+def test_flush_keeps_the_changes_of_other_writers(synthetic):
+    path = str(synthetic.abs_path)
+    synthetic.create_dataset("before", shape=(4,), chunks=None)
+    # another process appends frames, as out_to_zarr(append=True), and consolidates
+    code = (
+        "import zarr, llyr._store as s; m = zarr.open_group(%r); m.m.append(m.m[:3]);"
+        " s.consolidate(%r)" % (path, path)
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+    synthetic.create_dataset("after", shape=(4,), chunks=None)
+    synthetic.rm("stable")
+    synthetic.store.close()
+    m = llyr.op(path)
+    assert m.m.shape[0] == 35
+    assert "before" in m and "after" in m and "stable" not in m
+
+
+class ChunkReads(zarr.storage.FSStore):
+    """Records the chunk keys read"""
+
+    def __init__(self, url):
+        super().__init__(url)
+        self.reads = []
+
+    def __getitem__(self, key):
+        if not key.rsplit("/", 1)[-1].startswith("."):
+            self.reads.append(key)
+        return super().__getitem__(key)
+
+
+@pytest.fixture
+def remote(synthetic, tmp_path, monkeypatch):
+    """The synthetic sim as a fsspec url, with the chunk cache in tmp_path"""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    synthetic.store.flush()
+    return f"file://{synthetic.abs_path}"
+
+
+def test_chunk_cache_reads_once(remote, synthetic):
+    ref = synthetic.m[:]
+    base = ChunkReads(remote)
+    with ChunkCache(base, prefetch=False) as cache:
+        np.testing.assert_array_equal(zarr.open_array(cache, path="m")[:], ref)
+        assert len(base.reads) == synthetic.m.nchunks
+    # the next session reads the chunks from the disk
+    base = ChunkReads(remote)
+    with ChunkCache(base) as cache:
+        np.testing.assert_array_equal(zarr.open_array(cache, path="m")[:], ref)
+        assert base.reads == []
+        assert cache._pool is not None
+    assert cache._pool is None
+
+
+def test_chunk_cache_follows_rewrites(remote, synthetic):
+    with ChunkCache(zarr.storage.FSStore(remote), prefetch=False) as cache:
+        zarr.open_array(cache, path="m")[:]
+    # rewritten by another process, same shape
+    arr = synthetic.m[:] + 1
+    zarr.open_group(str(synthetic.abs_path)).create_dataset(
+        "m", data=arr, chunks=synthetic.m.chunks, overwrite=True
+    )
+    with ChunkCache(zarr.storage.FSStore(remote), prefetch=False) as cache:
+        np.testing.assert_array_equal(zarr.open_array(cache, path="m")[:], arr)
+        folders = os.listdir(os.path.join(cache.root, "m"))
+        assert len(folders) == 1
+        # chunks removed remotely are not answered from the cache
+        assert "m/0.0.0.0.0" in cache
+        del zarr.storage.DirectoryStore(str(synthetic.abs_path))["m/0.0.0.0.0"]
+        assert "m/0.0.0.0.0" not in cache
+
+
+def test_chunk_cache_disk_limit(remote, synthetic):
+    nbytes = synthetic.m.nbytes_stored
+    with ChunkCache(zarr.storage.FSStore(remote), disk=nbytes // 2, prefetch=False) as cache:
+        zarr.open_array(cache, path="m")[:]
+        assert cache.disk_bytes <= nbytes // 2
+        files = [os.path.join(r, f) for r, _, fs in os.walk(cache.root) for f in fs]
+        assert cache.disk_bytes == sum(os.path.getsize(f) for f in files)
@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+import zarr
+
+import llyr
+from llyr import _sweep
+
+
+def write_sim(path, param, seed, nf=50):
+    """A sim holding only its fft/m spectrum, the one of param 3 on another axis"""
+    rng = np.random.default_rng(seed)
+    freqs = np.linspace(0, 20, nf if param != 3 else nf + 7)
+    g = zarr.open_group(f"{path}/{param}.zarr", "a")
+    g.array("fft/m/freqs", freqs, overwrite=True)
+    g.array("fft/m/max", rng.random((len(freqs), 3)).astype(np.float32), overwrite=True)
+    # mtimes one second apart, whatever the file system resolution
+    mtime = os.stat(f"{path}/{param}.zarr/fft/m/max").st_mtime + seed
+    for p in (f"{path}/{param}.zarr/fft/m/max", f"{path}/{param}.zarr/fft/m/max/.zarray"):
+        os.utime(p, (mtime, mtime))
+
+
+def test_sweep_rereads_only_the_changed_sims(tmp_path, monkeypatch):
+    for seed, param in enumerate([1, 2, 3]):
+        write_sim(tmp_path, param, seed)
+    llyr.sweep_to_zarr(str(tmp_path))
+    read = []
+    load = _sweep._load_spectrum
+    monkeypatch.setattr(_sweep, "_load_spectrum", lambda args: read.append(args[0]) or load(args))
+    # a new sim and a recomputed one
+    write_sim(tmp_path, 4, 10)
+    write_sim(tmp_path, 3, 11)
+    sweep = llyr.sweep_to_zarr(str(tmp_path))
+    assert sorted(os.path.basename(p) for p in read) == ["3.zarr", "4.zarr"]
+    assert_same_as_a_full_rebuild(tmp_path, sweep)
+    np.testing.assert_array_equal(sweep.params[:], [1, 2, 3, 4])
+    # nothing changed, nothing read
+    read.clear()
+    llyr.sweep_to_zarr(str(tmp_path))
+    assert read == []
+    # a new first sim with its own frequency axis, everything is interpolated again
+    write_sim(tmp_path, 0.5, 12, nf=40)
+    sweep = llyr.sweep_to_zarr(str(tmp_path))
+    assert len(read) == 5
+    assert_same_as_a_full_rebuild(tmp_path, sweep)
+
+
+def assert_same_as_a_full_rebuild(path, sweep):
+    full = llyr.sweep_to_zarr(str(path), out=str(path / "full.zarr"))
+    np.testing.assert_array_equal(sweep.params[:], full.params[:])
+    np.testing.assert_array_equal(sweep.freqs[:], full.freqs[:])
+    np.testing.assert_array_equal(sweep.spec[:], full.spec[:])
+    # the next full rebuild starts from scratch
+    zarr.storage.DirectoryStore(str(path / "full.zarr")).rmdir()
@@ -0,0 +1,59 @@
+import numpy as np
+import zarr
+
+from llyr._utils import table_to_zarr
+from conftest import TESTS
+
+
+def write(path, lines):
+    with open(path, "w") as f:
+        f.writelines(lines)
+
+
+def check(table, lines):
+    ref = np.loadtxt(lines[1:], ndmin=2)
+    np.testing.assert_array_equal(table.t[:], ref[:, 0])
+    np.testing.assert_array_equal(table.m[:], ref[:, 1:4])
+    np.testing.assert_array_equal(table.B_ext[:], ref[:, 4:7])
+
+
+def test_table_matches_loadtxt(tmp_path):
+    with open(f"{TESTS}/test_sim.out/table.txt") as f:
+        lines = f.readlines()
+    m = zarr.open_group(str(tmp_path / "sim.zarr"), "w")
+    # tiny blocks so that the file is parsed in several pieces
+    assert table_to_zarr(f"{TESTS}/test_sim.out/table.txt", m, block_size=100) == len(lines) - 1
+    check(m.table, lines)
+    assert m.table.t.attrs["unit"] == "s" and m.table.B_ext.attrs["unit"] == "T"
+
+
+def test_table_append(tmp_path):
+    with open(f"{TESTS}/test_sim.out/table.txt") as f:
+        lines = f.readlines()
+    path = tmp_path / "table.txt"
+    m = zarr.open_group(str(tmp_path / "sim.zarr"), "w")
+    # the unfinished last line is left for the next call
+    write(path, lines[:3] + [lines[3][:10]])
+    assert table_to_zarr(str(path), m, append=True) == 2
+    write(path, lines)
+    assert table_to_zarr(str(path), m, append=True) == len(lines) - 3
+    assert table_to_zarr(str(path), m, append=True) == 0
+    check(m.table, lines)
+
+
+def test_table_truncated_or_rewritten_is_parsed_again(tmp_path):
+    with open(f"{TESTS}/test_sim.out/table.txt") as f:
+        lines = f.readlines()
+    path = tmp_path / "table.txt"
+    m = zarr.open_group(str(tmp_path / "sim.zarr"), "w")
+    write(path, lines)
+    table_to_zarr(str(path), m, append=True)
+    # restarted sim, shorter than what was parsed
+    write(path, lines[:3])
+    assert table_to_zarr(str(path), m, append=True) == 2
+    check(m.table, lines[:3])
+    # restarted with other values, longer than what was parsed
+    other = [lines[0]] + ["\t".join(["1"] * 7) + "\n"] * 5
+    write(path, other)
+    assert table_to_zarr(str(path), m, append=True) == 5
+    check(m.table, other)